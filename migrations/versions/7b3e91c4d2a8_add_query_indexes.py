@@ -0,0 +1,38 @@
+"""add query indexes
+
+Revision ID: 7b3e91c4d2a8
+Revises: ed20d5131a43
+Create Date: 2026-10-18 10:12:31.482113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e91c4d2a8'
+down_revision: Union[str, None] = 'ed20d5131a43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_email', 'users', ['email'], unique=True, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_books_created_at_uid', 'books', ['created_at', 'uid'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_books_user_uid_created_at_uid', 'books', ['user_uid', 'created_at', 'uid'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_reviews_book_uid_created_at_uid', 'reviews', ['book_uid', 'created_at', 'uid'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_reviews_user_uid', 'reviews', ['user_uid'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_reviews_user_uid', table_name='reviews', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_reviews_book_uid_created_at_uid', table_name='reviews', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_books_user_uid_created_at_uid', table_name='books', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_books_created_at_uid', table_name='books', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_email', table_name='users', postgresql_concurrently=True, if_exists=True)
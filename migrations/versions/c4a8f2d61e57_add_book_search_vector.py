@@ -0,0 +1,39 @@
+"""add book search vector
+
+Revision ID: c4a8f2d61e57
+Revises: 7b3e91c4d2a8
+Create Date: 2026-10-18 11:40:07.215964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8f2d61e57'
+down_revision: Union[str, None] = '7b3e91c4d2a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BOOK_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(publisher, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    # adding a stored generated column rewrites the books table
+    op.add_column('books', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(BOOK_SEARCH_DOCUMENT, persisted=True), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_books_search_vector', 'books', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_books_search_vector', table_name='books', postgresql_using='gin', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('books', 'search_vector')
@@ -0,0 +1,55 @@
+"""add book rating aggregates
+
+Revision ID: e5d17a3b9c20
+Revises: c4a8f2d61e57
+Create Date: 2026-10-18 18:12:31.406118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5d17a3b9c20'
+down_revision: Union[str, None] = 'c4a8f2d61e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_RATING_AGGREGATES = """
+UPDATE books
+SET review_count = stats.review_count,
+    rating_sum = stats.rating_sum,
+    rating_histogram = stats.rating_histogram
+FROM (
+    SELECT book_uid,
+           count(*) AS review_count,
+           sum(rating) AS rating_sum,
+           ARRAY[count(*) FILTER (WHERE rating = 1),
+                 count(*) FILTER (WHERE rating = 2),
+                 count(*) FILTER (WHERE rating = 3),
+                 count(*) FILTER (WHERE rating = 4),
+                 count(*) FILTER (WHERE rating = 5)]::integer[] AS rating_histogram
+    FROM reviews
+    WHERE book_uid IS NOT NULL
+    GROUP BY book_uid
+) AS stats
+WHERE books.uid = stats.book_uid
+"""
+
+
+def upgrade() -> None:
+    # constant defaults are stored in the catalog, so these do not rewrite books
+    op.add_column('books', sa.Column('review_count', sa.INTEGER(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_sum', sa.INTEGER(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_histogram', postgresql.ARRAY(sa.INTEGER()), server_default='{0,0,0,0,0}', nullable=False))
+    op.execute(BACKFILL_RATING_AGGREGATES)
+
+
+def downgrade() -> None:
+    op.drop_column('books', 'rating_histogram')
+    op.drop_column('books', 'rating_sum')
+    op.drop_column('books', 'review_count')
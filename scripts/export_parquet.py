@@ -0,0 +1,133 @@
+"""Write a Parquet snapshot of the users, books and reviews tables.
+
+    python -m scripts.export_parquet --out exports/
+
+Each table is read through a server-side cursor and written one row group per
+fetched batch, so memory stays flat however large the tables are. Sensitive
+columns are left out. The first read replica is used when one is configured.
+Requires pyarrow, which the API itself does not need: pip install pyarrow
+"""
+
+import argparse
+import asyncio
+import os
+import uuid
+from datetime import datetime
+
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy import ARRAY, Boolean, Date, DateTime, Integer
+from sqlmodel import select
+
+from src.config import Config
+from src.db.main import create_db_engine
+from src.db.models import Book, Review, User
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None
+
+EXCLUDED_COLUMNS = {
+    "users": {"password_hash", "email"},
+    "books": {"search_vector"},
+    "reviews": set(),
+}
+
+
+def arrow_type(column):
+    if isinstance(column.type, pg.UUID):
+        return pa.string()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column.type, Date):
+        return pa.date32()
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, ARRAY):
+        return pa.list_(pa.int64())
+    return pa.string()
+
+
+def export_columns(model) -> list:
+    excluded = EXCLUDED_COLUMNS[model.__tablename__]
+
+    return [column for column in model.__table__.columns if column.name not in excluded]
+
+
+def to_arrow(rows, columns: list, schema):
+    values = list(zip(*rows))
+    arrays = []
+
+    for column, field, column_values in zip(columns, schema, values):
+        if field.type == pa.string():
+            # asyncpg hands back uuid.UUID objects, arrow wants text
+            column_values = [
+                str(value) if isinstance(value, uuid.UUID) else value
+                for value in column_values
+            ]
+        arrays.append(pa.array(column_values, type=field.type))
+
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+async def export_table(conn, model, directory: str, batch_size: int) -> int:
+    columns = export_columns(model)
+    schema = pa.schema([(column.name, arrow_type(column)) for column in columns])
+    path = os.path.join(directory, f"{model.__tablename__}.parquet")
+    partial = f"{path}.partial"
+    exported = 0
+
+    result = await conn.stream(select(*columns).execution_options(yield_per=batch_size))
+
+    # written under a temporary name so readers never pick up half a snapshot
+    with pq.ParquetWriter(partial, schema, compression="zstd") as writer:
+        async for rows in result.partitions():
+            writer.write_table(to_arrow(rows, columns, schema))
+            exported += len(rows)
+
+    os.replace(partial, path)
+
+    return exported
+
+
+async def main(args) -> None:
+    directory = os.path.join(args.out, datetime.now().strftime("%Y%m%dT%H%M%S"))
+    os.makedirs(directory, exist_ok=True)
+    engine = create_db_engine(args.url)
+
+    try:
+        # one repeatable read transaction keeps the three files consistent
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="REPEATABLE READ")
+            async with conn.begin():
+                for model in (User, Book, Review):
+                    started = datetime.now()
+                    exported = await export_table(
+                        conn, model, directory, args.batch_size
+                    )
+                    print(
+                        f"exported {exported} {model.__tablename__} rows"
+                        f" in {datetime.now() - started}"
+                    )
+    finally:
+        await engine.dispose()
+
+    print(f"snapshot written to {directory}")
+
+
+if __name__ == "__main__":
+    replicas = [url.strip() for url in Config.DATABASE_REPLICA_URLS.split(",")]
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=replicas[0] or Config.DATABASE_URL)
+    parser.add_argument("--out", default="exports")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    if pa is None:
+        parser.exit(1, "pyarrow is required for Parquet exports: pip install pyarrow\n")
+
+    asyncio.run(main(args))
@@ -0,0 +1,197 @@
+"""Seed a scratch database and compare query plans with and without indexes.
+
+    python -m scripts.query_plan_benchmark --users 50000 --books 500000
+
+Point DATABASE_URL (or --url) at a throwaway database: the script creates the
+tables if needed, appends the seed rows, then drops and recreates every index
+declared on the models while it runs EXPLAIN ANALYZE on the service queries.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+from datetime import datetime
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql
+from sqlmodel import SQLModel, select
+
+from src.books.service import BOOK_CURSOR, BOOK_KEYSET, SEARCH_CONFIG, SEARCH_CURSOR
+from src.config import Config
+from src.db.main import create_db_engine
+from src.db.models import Book, Review, User
+from src.db.pagination import DEFAULT_PAGE_SIZE, encode_cursor, keyset
+from src.reviews.service import REVIEW_CURSOR, REVIEW_KEYSET
+
+SEED_USERS = """
+INSERT INTO users (uid, username, email, first_name, last_name, role,
+                   is_verified, password_hash, created_at, update_at)
+SELECT gen_random_uuid(), 'user' || n, 'bench' || :tag || '.' || n || '@mail.com',
+       'John', 'Doe',
+       'user', true, 'x', now() - n * interval '1 minute', now()
+FROM generate_series(1, :count) AS n
+"""
+
+SEED_BOOKS = """
+INSERT INTO books (uid, title, author, publisher, published_date, page_count,
+                   language, user_uid, created_at, update_at)
+SELECT gen_random_uuid(), 'Book ' || n, 'Author ' || n % 5000, 'Publisher ' || n % 200,
+       date '2000-01-01' + n % 9000, 100 + n % 900,
+       (ARRAY['en', 'fr', 'de', 'es'])[1 + n % 4],
+       u.uids[1 + n % array_length(u.uids, 1)],
+       now() - n * interval '1 second', now()
+FROM generate_series(1, :count) AS n,
+     (SELECT array_agg(uid) AS uids FROM users) AS u
+"""
+
+SEED_REVIEWS = """
+INSERT INTO reviews (uid, rating, review_text, user_uid, book_uid, created_at, update_at)
+SELECT gen_random_uuid(), 1 + n % 5, 'A good read',
+       u.uids[1 + n % array_length(u.uids, 1)],
+       b.uids[1 + (n * 7919) % array_length(b.uids, 1)],
+       now() - n * interval '1 second', now()
+FROM generate_series(1, :count) AS n,
+     (SELECT array_agg(uid) AS uids FROM users) AS u,
+     (SELECT array_agg(uid) AS uids FROM books) AS b
+"""
+
+
+async def seed(conn, users: int, books: int, reviews: int) -> None:
+    await conn.run_sync(SQLModel.metadata.create_all)
+
+    # emails must stay unique when the script is run again on the same database
+    tag = str(int(datetime.now().timestamp()))
+
+    for statement, params in (
+        (SEED_USERS, {"count": users, "tag": tag}),
+        (SEED_BOOKS, {"count": books}),
+        (SEED_REVIEWS, {"count": reviews}),
+    ):
+        started = datetime.now()
+        await conn.execute(text(statement), params)
+        print(f"seeded {params['count']} rows in {datetime.now() - started}")
+
+
+async def sample_queries(conn) -> dict:
+    """The statements BookService and AuthService issue, bound to seeded rows."""
+    user = (await conn.execute(text("SELECT uid, email FROM users LIMIT 1"))).one()
+    book_uid = (await conn.execute(text("SELECT uid FROM books LIMIT 1"))).scalar()
+    deep = (
+        await conn.execute(
+            text(
+                "SELECT created_at, uid FROM books ORDER BY created_at DESC, uid DESC"
+                " OFFSET (SELECT count(*) * 9 / 10 FROM books) LIMIT 1"
+            )
+        )
+    ).one()
+    search = func.websearch_to_tsquery(SEARCH_CONFIG, "Author 42")
+    search_rank = func.ts_rank_cd(Book.search_vector, search)
+
+    return {
+        "AuthService.get_user_by_email": select(User).where(User.email == user.email),
+        "AuthService.get_user_profile (books)": select(Book).where(
+            Book.user_uid.in_([user.uid])
+        ),
+        "AuthService.get_user_profile (reviews)": select(Review).where(
+            Review.user_uid.in_([user.uid])
+        ),
+        "BookService.get_all_books (first page)": keyset(
+            select(Book), BOOK_KEYSET, BOOK_CURSOR, DEFAULT_PAGE_SIZE
+        ),
+        "BookService.get_all_books (90% deep)": keyset(
+            select(Book),
+            BOOK_KEYSET,
+            BOOK_CURSOR,
+            DEFAULT_PAGE_SIZE,
+            encode_cursor(*deep),
+        ),
+        "BookService.get_user_book_submission": keyset(
+            select(Book).where(Book.user_uid == user.uid),
+            BOOK_KEYSET,
+            BOOK_CURSOR,
+            DEFAULT_PAGE_SIZE,
+        ),
+        "ReviewService.get_book_reviews": keyset(
+            select(Review).where(Review.book_uid == book_uid),
+            REVIEW_KEYSET,
+            REVIEW_CURSOR,
+            DEFAULT_PAGE_SIZE,
+        ),
+        "BookService.search_books": keyset(
+            select(Book, search_rank).where(Book.search_vector.op("@@")(search)),
+            (search_rank, Book.uid),
+            SEARCH_CURSOR,
+            DEFAULT_PAGE_SIZE,
+        ),
+    }
+
+
+async def explain(conn, statement, runs: int) -> tuple[float, str]:
+    sql = statement.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    timings = []
+
+    for _ in range(runs):
+        result = await conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"))
+        plan = result.scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        timings.append(plan[0]["Execution Time"])
+
+    return statistics.median(timings), plan[0]["Plan"]["Node Type"]
+
+
+async def measure(conn, queries: dict, runs: int) -> dict:
+    await conn.execute(text("ANALYZE"))
+
+    return {name: await explain(conn, query, runs) for name, query in queries.items()}
+
+
+def set_indexes(sync_conn, present: bool) -> None:
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.drop(sync_conn, checkfirst=True)
+
+            if present:
+                index.create(sync_conn)
+
+
+async def main(args) -> None:
+    engine = create_db_engine(args.url)
+
+    async with engine.begin() as conn:
+        if not args.skip_seed:
+            await seed(conn, args.users, args.books, args.reviews)
+
+    async with engine.begin() as conn:
+        queries = await sample_queries(conn)
+
+        await conn.run_sync(set_indexes, False)
+        before = await measure(conn, queries, args.runs)
+
+        await conn.run_sync(set_indexes, True)
+        after = await measure(conn, queries, args.runs)
+
+    await engine.dispose()
+
+    print(f"\n{'query':<45}{'before':>24}{'after':>24}")
+    for name in queries:
+        (before_ms, before_node), (after_ms, after_node) = before[name], after[name]
+        print(
+            f"{name:<45}"
+            f"{before_ms:>10.2f}ms {before_node:>12}"
+            f"{after_ms:>10.2f}ms {after_node:>12}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=Config.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--books", type=int, default=500_000)
+    parser.add_argument("--reviews", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true")
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,40 @@
+"""Rebuild the top-rated and trending leaderboards from the database.
+
+    python -m scripts.rebuild_leaderboards
+
+Run it after restoring Redis, after changing the leaderboard settings, or on
+a schedule to undo drift from books whose language changed.
+"""
+
+import argparse
+import asyncio
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.books.leaderboard import leaderboards
+from src.config import Config
+from src.db.main import create_db_engine
+from src.db.redis import close_redis
+
+
+async def main(args) -> None:
+    engine = create_db_engine(args.url)
+
+    try:
+        async with AsyncSession(engine) as session:
+            boards = await leaderboards.rebuild(session)
+    finally:
+        await engine.dispose()
+        await close_redis()
+
+    for key, size in sorted(boards.items()):
+        print(f"{key:<45}{size:>8} books")
+
+
+if __name__ == "__main__":
+    replicas = [url.strip() for url in Config.DATABASE_REPLICA_URLS.split(",")]
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=replicas[0] or Config.DATABASE_URL)
+
+    asyncio.run(main(parser.parse_args()))
@@ -1,12 +1,19 @@
 from fastapi import Depends, FastAPI
 from src.books.routes import book_router
+from src.books.suggest import suggest_index
+from src.books.views import view_counter
 from src.auth.routes import auth_router
 from src.errors import register_all_errors
 from src.middleware import register_middleware
+from src.reviews.buffer import review_buffer
 from src.reviews.routes import reviews_router
+from src.metrics.routes import metrics_router
+import asyncio
 from contextlib import asynccontextmanager
-from src.db.main import init_db
+from src.db.main import async_session, engine, init_db, replica_router
+from src.db.redis import close_redis, init_redis, listen_for_revocations
 from src.auth.dependencies import RoleChecker
+from src.auth.utils import password_hasher
 from .errors import register_all_errors
 
 
@@ -14,7 +21,22 @@ from .errors import register_all_errors
 async def life_span(app: FastAPI):
     print(f"server is starting...")
     await init_db()
+    init_redis()
+    async with async_session() as session:
+        await suggest_index.build(session)
+    revocation_listener = asyncio.create_task(listen_for_revocations())
+    replica_monitor = asyncio.create_task(replica_router.monitor())
+    review_flusher = asyncio.create_task(review_buffer.run())
+    view_flusher = asyncio.create_task(view_counter.run())
     yield
+    await review_buffer.close(review_flusher)
+    await view_counter.close(view_flusher)
+    replica_monitor.cancel()
+    revocation_listener.cancel()
+    await close_redis()
+    await replica_router.dispose()
+    await engine.dispose()
+    password_hasher.shutdown()
     print(f"server has been stopped")
 
 
@@ -36,6 +58,7 @@ app = FastAPI(
     openapi_url=f"{version_prefix}/openapi.json",
     # docs_url=f"{version_prefix}/docs",
     # redoc_url=f"{version_prefix}/redoc",
+    lifespan=life_span,
 )
 
 register_all_errors(app)
@@ -50,3 +73,9 @@ app.include_router(
     prefix=f"{version_prefix}/reviews",
     dependencies=[Depends(RoleChecker("user"))],
 )
+app.include_router(
+    metrics_router,
+    tags=["Metrics"],
+    prefix=f"{version_prefix}/metrics",
+    dependencies=[Depends(RoleChecker(["admin"]))],
+)
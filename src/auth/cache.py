@@ -0,0 +1,71 @@
+import logging
+import time
+
+from src.cache import LRUCache
+from src.config import Config
+from src.db.redis import get_redis
+from .schemas import Principal
+
+
+class PrincipalCache:
+    """Two-tier cache of authenticated principals keyed by user uid.
+
+    The in-process tier answers the hot path without any network call; the
+    optional Redis tier lets a fresh worker skip the database too. Redis
+    failures only cost a database lookup.
+    """
+
+    def __init__(self, maxsize: int, ttl: int, redis_ttl: int, use_redis: bool):
+        self.local = LRUCache(maxsize=maxsize)
+        self.ttl = ttl
+        self.redis_ttl = redis_ttl
+        self.use_redis = use_redis
+
+    def redis_key(self, uid: str) -> str:
+        return f"principal:{uid}"
+
+    async def get(self, uid: str) -> Principal | None:
+        principal = self.local.get(uid)
+
+        if principal is None and self.use_redis:
+            try:
+                raw = await get_redis().get(self.redis_key(uid))
+            except Exception as e:
+                logging.error(e)
+                raw = None
+
+            if raw is not None:
+                principal = Principal.model_validate_json(raw)
+                self.local.set(uid, principal, expires_at=time.time() + self.ttl)
+
+        return principal
+
+    async def set(self, principal: Principal) -> None:
+        uid = str(principal.uid)
+        self.local.set(uid, principal, expires_at=time.time() + self.ttl)
+
+        if self.use_redis:
+            try:
+                await get_redis().set(
+                    self.redis_key(uid), principal.model_dump_json(), ex=self.redis_ttl
+                )
+            except Exception as e:
+                logging.error(e)
+
+    async def invalidate(self, uid: str) -> None:
+        uid = str(uid)
+        self.local.delete(uid)
+
+        if self.use_redis:
+            try:
+                await get_redis().delete(self.redis_key(uid))
+            except Exception as e:
+                logging.error(e)
+
+
+principal_cache = PrincipalCache(
+    maxsize=Config.PRINCIPAL_CACHE_SIZE,
+    ttl=Config.PRINCIPAL_CACHE_TTL,
+    redis_ttl=Config.PRINCIPAL_REDIS_TTL,
+    use_redis=Config.PRINCIPAL_CACHE_USE_REDIS,
+)
@@ -2,15 +2,15 @@ from typing import List, Optional
 from fastapi import Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from src.db.models import User
-
-from .utils import decode_access_token
+from .utils import decode_access_token_cached
 from src.db.redis import token_in_blocklist
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.db.main import get_session
+from .schemas import Principal
 from .service import AuthService
 from src.errors import (
     AccountNotVerified,
+    UserNotFound,
     InvalidToken,
     RevokedToken,
     AccessTokenRequired,
@@ -34,9 +34,10 @@ class TokenBearer(HTTPBearer):
         if creds.scheme.lower() != "bearer":
             raise InvalidToken()
 
-        if not self.token_is_valid(creds.credentials):
+        token_data = decode_access_token_cached(creds.credentials)
+
+        if token_data is None:
             raise InvalidToken()
-        token_data = decode_access_token(creds.credentials)
 
         in_blocklist = await token_in_blocklist(token_data["jti"])
 
@@ -51,7 +52,7 @@ class TokenBearer(HTTPBearer):
         raise NotImplementedError("Subclasses must implement this method")
 
     def token_is_valid(self, token: str) -> bool:
-        payload = decode_access_token(token)
+        payload = decode_access_token_cached(token)
         return payload is not None
 
 
@@ -78,10 +79,14 @@ class RefreshTokenBearer(TokenBearer):
 async def get_current_user(
     token_data: dict = Depends(AcessTokenBearer()),
     session: AsyncSession = Depends(get_session),
-) -> dict:
-    user_email = token_data["user"]["email"]
+) -> Principal:
+    user_uid = token_data["user"]["uid"]
+
+    # the session is only used on a principal cache miss
+    user = await auth_service.get_principal(user_uid, session)
 
-    user = await auth_service.get_user_by_email(user_email, session)
+    if user is None:
+        raise UserNotFound()
 
     return user
 
@@ -90,7 +95,7 @@ class RoleChecker:
     def __init__(self, allowed_roles: List[str]):
         self.allowed_roles = allowed_roles
 
-    async def __call__(self, user: User = Depends(get_current_user)) -> dict:
+    async def __call__(self, user: Principal = Depends(get_current_user)) -> Principal:
 
         if not user.is_verified:
             raise AccountNotVerified()
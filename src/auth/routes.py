@@ -5,6 +5,7 @@ from src.db.redis import add_jti_to_block_list
 from .schemas import (
     EmailModel,
     PasswordResetConfirmModel,
+    Principal,
     PasswordResetRequestModel,
     SignUpResponseModel,
     UserCreateModel,
@@ -12,14 +13,14 @@ from .schemas import (
     UserBooks,
 )
 from .service import AuthService
-from src.db.main import get_session
+from src.db.main import get_read_session, get_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from .utils import (
     create_access_token,
-    verify_password,
+    verify_password_async,
     create_url_safe_token,
     decode_url_safe_token,
-    get_password_hash,
+    get_password_hash_async,
 )
 from .dependencies import RefreshTokenBearer, AcessTokenBearer, get_current_user
 from src.errors import InvalidCredentials, UserAlreadyExists, InvalidToken, UserNotFound
@@ -103,7 +104,7 @@ async def login(
     if user is None:
         raise InvalidCredentials()
 
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         raise InvalidCredentials()
 
     # if not user.is_verified:
@@ -188,9 +189,12 @@ async def refresh_token(
 
 
 @auth_router.get("/me", status_code=status.HTTP_200_OK, response_model=UserBooks)
-async def get_current_user(user: dict = Depends(get_current_user)):
+async def get_current_user(
+    user: Principal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+):
 
-    return user
+    return await user_service.get_user_profile(user.uid, session)
 
 
 @auth_router.get("/logout", status_code=status.HTTP_200_OK)
@@ -250,7 +254,7 @@ async def reset_account_password(
         if not user:
             raise UserNotFound()
 
-        passwd_hash = get_password_hash(new_password)
+        passwd_hash = await get_password_hash_async(new_password)
         await user_service.update_user(user, {"password_hash": passwd_hash}, session)
 
         return JSONResponse(
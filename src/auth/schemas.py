@@ -18,6 +18,13 @@ class UserModel(BaseModel):
     updated_at: datetime
 
 
+class Principal(BaseModel):
+    uid: uuid.UUID
+    email: str
+    role: str
+    is_verified: bool
+
+
 class SignUpResponseModel(BaseModel):
     message: str
     user: UserModel
@@ -1,6 +1,10 @@
+from datetime import datetime
+from sqlalchemy import update
+from src.db.loaders import USER_PROFILE, USER_SUMMARY
 from src.db.models import User
-from .schemas import UserCreateModel
-from .utils import get_password_hash, verify_password
+from .cache import principal_cache
+from .schemas import Principal, UserCreateModel
+from .utils import get_password_hash_async
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -9,13 +13,37 @@ class AuthService:
 
     # @staticmethod
     async def get_user_by_email(self, email: str, session: AsyncSession) -> User | None:
-        user = await session.exec(select(User).where(User.email == email))
+        user = await session.exec(
+            select(User).options(*USER_SUMMARY).where(User.email == email)
+        )
         return user.first()
 
     async def get_user_by_id(self, uid: str, session: AsyncSession) -> User | None:
-        user = await session.exec(select(User).where(User.uid == uid))
+        user = await session.exec(
+            select(User).options(*USER_SUMMARY).where(User.uid == uid)
+        )
         return user.first()
 
+    async def get_user_profile(self, uid: str, session: AsyncSession) -> User | None:
+        user = await session.exec(
+            select(User).options(*USER_PROFILE).where(User.uid == uid)
+        )
+        return user.first()
+
+    async def get_principal(self, uid: str, session: AsyncSession) -> Principal | None:
+        principal = await principal_cache.get(uid)
+
+        if principal is None:
+            user = await self.get_user_by_id(uid, session)
+
+            if user is None:
+                return None
+
+            principal = Principal.model_validate(user, from_attributes=True)
+            await principal_cache.set(principal)
+
+        return principal
+
     # @staticmethod
     async def user_exists(self, email: str, session: AsyncSession) -> bool:
         user = await self.get_user_by_email(email, session)
@@ -28,7 +56,9 @@ class AuthService:
 
         new_user = User(**user_data_dict)
 
-        new_user.password_hash = get_password_hash(user_data_dict["password"])
+        new_user.password_hash = await get_password_hash_async(
+            user_data_dict["password"]
+        )
         new_user.role = "user"
 
         session.add(new_user)
@@ -38,10 +68,17 @@ class AuthService:
         return new_user
 
     async def update_user(self, user: User, user_data: dict, session: AsyncSession):
-
-        for k, v in user_data.items():
-            setattr(user, k, v)
+        statement = (
+            update(User)
+            .where(User.uid == user.uid)
+            .values(**user_data, update_at=datetime.now())
+            .returning(User)
+        )
+        result = await session.exec(statement)
+        updated_user = result.scalars().first()
 
         await session.commit()
 
-        return user
+        await principal_cache.invalidate(user.uid)
+
+        return updated_user
@@ -1,8 +1,14 @@
+import asyncio
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 import jwt
+from src.cache import LRUCache
 from src.config import Config
+from src.errors import ServiceBusy
 import uuid
 from itsdangerous import URLSafeTimedSerializer
 
@@ -14,6 +20,8 @@ serializer = URLSafeTimedSerializer(
 ACCESS_TOKEN_EXPIRY = 1
 REFRESH_TOKEN_EXPIRY = 2
 
+token_cache = LRUCache(maxsize=Config.TOKEN_CACHE_SIZE)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -23,6 +31,57 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism.
+    Once `max_pending` calls are queued or running, new calls are rejected with
+    ServiceBusy instead of piling up behind a login storm.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+        self.max_pending = max_pending
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    async def run(self, func, *args):
+        with self.lock:
+            if self.pending >= self.max_pending:
+                raise ServiceBusy()
+
+            self.pending += 1
+
+        # counted down when the thread is done with it, not when the caller
+        # stops waiting: a cancelled await does not stop a hash already running
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(self.release)
+        return await asyncio.wrap_future(future)
+
+    def release(self, future) -> None:
+        with self.lock:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, refresh: bool = False) -> str:
     token = jwt.encode(
         payload={
@@ -53,6 +112,24 @@ def decode_access_token(token: str) -> dict:
         return None
 
 
+def decode_access_token_cached(token: str) -> dict:
+    """Decode a token once and reuse its claims until the token expires.
+
+    Every bearer dependency on a request goes through here, so a request that
+    lists several of them only pays for one signature check.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    token_data = token_cache.get(key)
+
+    if token_data is None:
+        token_data = decode_access_token(token)
+
+        if token_data is not None:
+            token_cache.set(key, token_data, expires_at=token_data["exp"])
+
+    return token_data
+
+
 def create_url_safe_token(data: dict):
 
     token = serializer.dumps(data)
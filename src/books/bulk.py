@@ -0,0 +1,123 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Optional, Tuple
+
+from src.config import Config
+
+# every parser yields (row number, row, error); exactly one of row/error is set
+ParsedRow = Tuple[int, Optional[dict], Optional[str]]
+
+ROW_TOO_LONG = "row is too long"
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_length: int = Config.BOOK_IMPORT_MAX_ROW_LENGTH
+) -> AsyncIterator[Optional[str]]:
+    """Decoded lines; a line over `max_length` characters comes out as None.
+
+    Only the current line is buffered and an over-long one is dropped as it
+    arrives, so memory stays bounded whatever the upload holds.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    overflowed = False
+
+    async for chunk in chunks:
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+
+        for line in lines:
+            if overflowed or len(line) > max_length:
+                overflowed = False
+                yield None
+            else:
+                yield line.rstrip("\r")
+
+        if len(pending) > max_length:
+            overflowed = True
+            pending = ""
+
+    pending += decoder.decode(b"", final=True)
+
+    if overflowed or len(pending) > max_length:
+        yield None
+    elif pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson_rows(
+    lines: AsyncIterator[Optional[str]],
+) -> AsyncIterator[ParsedRow]:
+    row_number = 0
+
+    async for line in lines:
+        if line is None:
+            row_number += 1
+            yield row_number, None, ROW_TOO_LONG
+            continue
+
+        if not line.strip():
+            continue
+
+        row_number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"invalid JSON: {e}"
+            continue
+
+        if isinstance(row, dict):
+            yield row_number, row, None
+        else:
+            yield row_number, None, "expected a JSON object"
+
+
+async def iter_csv_rows(
+    lines: AsyncIterator[Optional[str]],
+    max_length: int = Config.BOOK_IMPORT_MAX_ROW_LENGTH,
+) -> AsyncIterator[ParsedRow]:
+    header = None
+    record = []
+    length = 0
+    quoted = False
+    row_number = 0
+
+    async for line in lines:
+        if line is None or length + len(line) > max_length:
+            # drop the record; an unmatched quote costs one row, not the upload
+            record, length, quoted = [], 0, False
+            row_number += 1
+            yield row_number, None, ROW_TOO_LONG
+            continue
+
+        record.append(line)
+        length += len(line) + 1
+
+        # an odd number of quotes toggles whether a quoted field continues on
+        # the next line; only the new line is counted
+        if line.count('"') % 2:
+            quoted = not quoted
+
+        if quoted:
+            continue
+
+        text = "\n".join(record)
+        record, length = [], 0
+
+        if not text.strip():
+            continue
+
+        fields = next(csv.reader([text]))
+
+        if header is None:
+            header = [name.strip() for name in fields]
+            continue
+
+        row_number += 1
+        if len(fields) == len(header):
+            yield row_number, dict(zip(header, fields)), None
+        else:
+            yield row_number, None, f"expected {len(header)} fields, got {len(fields)}"
+
+    if record:
+        yield row_number + 1, None, "unterminated quoted field"
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import random
+import time
+import uuid
+from typing import Awaitable, Callable, Optional, Tuple
+
+from redis.exceptions import WatchError
+
+from src.cache import LRUCache, SingleFlight
+from src.config import Config
+from src.db.redis import get_redis
+
+LOCK_POLL_INTERVAL = 0.05
+
+# (etag, encoded payload)
+Entry = Tuple[str, bytes]
+
+# stored for books that do not exist, so hammering a bad id stays off the database
+MISSING = b""
+
+
+class BookDetailCache:
+    """Read-through Redis cache of serialized BookDetailModel payloads.
+
+    Entries are a Redis hash of the JSON bytes and their ETag, keyed by book
+    uid, so a hit can answer a conditional GET without the database. TTLs
+    carry random jitter so entries written together do not expire together.
+    On a miss only the caller that wins a short SET NX lock runs the loader;
+    others poll for its result and fall back to loading themselves once
+    `lock_wait` runs out.
+
+    Writers call `invalidate` after they commit, which deletes the entry and
+    bumps the book's generation. A fill only lands if the generation is still
+    the one read before loading, so a load racing a write cannot put the old
+    body back. When Redis is down every read goes to the loader and nothing
+    is cached.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        jitter: int,
+        missing_ttl: int,
+        lock_timeout: float,
+        lock_wait: float,
+    ):
+        self.ttl = ttl
+        self.jitter = jitter
+        self.missing_ttl = missing_ttl
+        self.lock_timeout_ms = int(lock_timeout * 1000)
+        self.lock_wait = lock_wait
+        self.hits = 0
+        self.misses = 0
+        self.lock_waits = 0
+        self.stale_fills = 0
+        self.errors = 0
+
+    def key(self, book_uid) -> Optional[str]:
+        try:
+            return f"book:detail:{uuid.UUID(str(book_uid))}"
+        except ValueError:
+            return None
+
+    async def get_or_load(
+        self, book_uid: str, loader: Callable[[], Awaitable[Optional[Entry]]]
+    ) -> Optional[Entry]:
+        """Cached (etag, payload) for `book_uid`, or None when the book is missing.
+
+        `loader` returns the entry to cache, or None for a missing book.
+        """
+        key = self.key(book_uid)
+
+        if key is None:
+            return await loader()
+
+        generation_key = f"{key}:generation"
+
+        try:
+            redis = get_redis()
+            entry = await self.read(key)
+
+            if entry is not None:
+                self.hits += 1
+                return entry if entry[0] else None
+
+            self.misses += 1
+            lock_key = f"{key}:lock"
+            token = uuid.uuid4().hex
+
+            if not await redis.set(lock_key, token, nx=True, px=self.lock_timeout_ms):
+                entry = await self.wait_for(key)
+
+                if entry is not None:
+                    return entry if entry[0] else None
+
+            # read before loading: a write committed after this point bumps it
+            generation = await redis.get(generation_key)
+        except Exception as e:
+            logging.error(e)
+            self.errors += 1
+            return await loader()
+
+        entry = await loader()
+
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(generation_key)
+
+                if await pipe.get(generation_key) == generation:
+                    pipe.multi()
+
+                    if entry is None:
+                        pipe.hset(key, mapping={"etag": "", "body": MISSING})
+                        pipe.expire(key, self.missing_ttl)
+                    else:
+                        etag, payload = entry
+                        pipe.hset(key, mapping={"etag": etag, "body": payload})
+                        pipe.expire(key, self.ttl + random.randint(0, self.jitter))
+                    await pipe.execute()
+                else:
+                    self.stale_fills += 1
+        except WatchError:
+            # invalidated between the check and the write
+            self.stale_fills += 1
+        except Exception as e:
+            logging.error(e)
+            self.errors += 1
+
+        try:
+            # only release the lock if it is still ours
+            if await redis.get(lock_key) == token.encode():
+                await redis.delete(lock_key)
+        except Exception as e:
+            logging.error(e)
+            self.errors += 1
+
+        return entry
+
+    async def peek(self, book_uid) -> Optional[Entry]:
+        """The cached entry, without loading on a miss; the etag of a cached
+        missing book is empty. None when nothing is cached or Redis fails.
+        """
+        key = self.key(book_uid)
+
+        if key is None:
+            return None
+
+        try:
+            entry = await self.read(key)
+        except Exception as e:
+            logging.error(e)
+            self.errors += 1
+            return None
+
+        if entry is not None:
+            self.hits += 1
+
+        return entry
+
+    async def read(self, key: str) -> Optional[Entry]:
+        etag, payload = await get_redis().hmget(key, "etag", "body")
+
+        if etag is None:
+            return None
+
+        return etag.decode(), payload
+
+    async def wait_for(self, key: str) -> Optional[Entry]:
+        self.lock_waits += 1
+        deadline = time.monotonic() + self.lock_wait
+
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            entry = await self.read(key)
+
+            if entry is not None:
+                return entry
+
+        return None
+
+    async def invalidate(self, book_uid) -> None:
+        key = self.key(book_uid)
+
+        if key is None:
+            return
+
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                pipe.incr(f"{key}:generation")
+                # outlives any load that could have read the old generation
+                pipe.expire(f"{key}:generation", self.ttl + self.jitter)
+                pipe.delete(key)
+                await pipe.execute()
+        except Exception as e:
+            logging.error(e)
+            self.errors += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "lock_waits": self.lock_waits,
+            "stale_fills": self.stale_fills,
+            "errors": self.errors,
+        }
+
+
+book_detail_cache = BookDetailCache(
+    ttl=Config.BOOK_CACHE_TTL,
+    jitter=Config.BOOK_CACHE_TTL_JITTER,
+    missing_ttl=Config.BOOK_CACHE_MISSING_TTL,
+    lock_timeout=Config.BOOK_CACHE_LOCK_TIMEOUT,
+    lock_wait=Config.BOOK_CACHE_LOCK_WAIT,
+)
+
+
+# encoded response bodies keyed by the version of what they render, so a stale
+# entry is never looked up again and simply ages out
+book_response_cache = LRUCache(maxsize=Config.BOOK_RESPONSE_CACHE_SIZE)
+
+# concurrent identical reads in this process share one database call
+book_flights = SingleFlight()
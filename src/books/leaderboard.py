@@ -0,0 +1,242 @@
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.models import Book, Review
+from src.db.redis import get_redis
+
+TOP_RATED = "top_rated"
+TRENDING = "trending"
+ALL_LANGUAGES = "all"
+
+# reviews older than this many half-lives add less than 0.1% to a trending score
+TRENDING_HORIZON = 10
+
+
+class Leaderboards:
+    """Top-rated and trending books in Redis sorted sets, per language and overall.
+
+    Top-rated scores are a Bayesian average that pulls books with few reviews
+    toward `prior_mean`. Trending uses forward decay: each review adds
+    2 ** ((t - epoch) / half_life), so older reviews weigh less without ever
+    rewriting old scores; dividing by the current weight gives the number of
+    "recent" reviews. Every board keeps only its best `size` books.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        prior_mean: float,
+        prior_weight: float,
+        half_life: timedelta,
+        epoch: datetime,
+    ):
+        self.size = size
+        self.prior_mean = prior_mean
+        self.prior_weight = prior_weight
+        self.half_life = half_life.total_seconds()
+        self.epoch = epoch
+
+    def key(self, board: str, language: str = ALL_LANGUAGES) -> str:
+        return f"leaderboard:{board}:{language}"
+
+    def rating_score(self, review_count: int, rating_sum: int) -> float:
+        return (self.prior_weight * self.prior_mean + rating_sum) / (
+            self.prior_weight + review_count
+        )
+
+    def trending_weight(self, at: datetime) -> float:
+        return 2 ** ((at - self.epoch).total_seconds() / self.half_life)
+
+    async def record(
+        self,
+        book_uid,
+        language: str,
+        review_count: int,
+        rating_sum: int,
+        reviews: int = 1,
+    ) -> None:
+        """Fold newly committed reviews of a book into its boards.
+
+        With `reviews=0` only the top-rated score is refreshed, for aggregates
+        corrected after the fact.
+        """
+        book_uid = str(book_uid)
+        score = self.rating_score(review_count, rating_sum)
+        increment = reviews * self.trending_weight(datetime.now())
+
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for language_key in (language, ALL_LANGUAGES):
+                    top_rated = self.key(TOP_RATED, language_key)
+                    trending = self.key(TRENDING, language_key)
+
+                    # rebuild leaves unreviewed books off the board too
+                    if review_count:
+                        pipe.zadd(top_rated, {book_uid: score})
+                        pipe.zremrangebyrank(top_rated, 0, -self.size - 1)
+                    else:
+                        pipe.zrem(top_rated, book_uid)
+
+                    if reviews:
+                        pipe.zincrby(trending, increment, book_uid)
+                        pipe.zremrangebyrank(trending, 0, -self.size - 1)
+                await pipe.execute()
+        except Exception as e:
+            logging.error(e)
+
+    async def move(
+        self,
+        book_uid,
+        old_language: str,
+        language: str,
+        review_count: int,
+        rating_sum: int,
+    ) -> None:
+        """Move a book from one language's boards to another's.
+
+        The top-rated score is recomputed from the aggregates; the trending
+        score cannot be, so it is carried over as it stands.
+        """
+        book_uid = str(book_uid)
+
+        try:
+            trending = await get_redis().zscore(
+                self.key(TRENDING, old_language), book_uid
+            )
+
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for board in (TOP_RATED, TRENDING):
+                    pipe.zrem(self.key(board, old_language), book_uid)
+
+                if trending is not None:
+                    pipe.zadd(self.key(TRENDING, language), {book_uid: trending})
+                    pipe.zremrangebyrank(
+                        self.key(TRENDING, language), 0, -self.size - 1
+                    )
+                await pipe.execute()
+        except Exception as e:
+            logging.error(e)
+            return
+
+        await self.record(book_uid, language, review_count, rating_sum, reviews=0)
+
+    async def remove(self, book_uid, language: str) -> None:
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for board in (TOP_RATED, TRENDING):
+                    for language_key in (language, ALL_LANGUAGES):
+                        pipe.zrem(self.key(board, language_key), str(book_uid))
+                await pipe.execute()
+        except Exception as e:
+            logging.error(e)
+
+    async def top(
+        self, board: str, language: str = ALL_LANGUAGES, limit: int = 20
+    ) -> list[tuple[str, float]]:
+        """The best `limit` (book uid, score) pairs on a board, best first."""
+        try:
+            members = await get_redis().zrevrange(
+                self.key(board, language), 0, limit - 1, withscores=True
+            )
+        except Exception as e:
+            logging.error(e)
+            return []
+
+        if board == TRENDING:
+            now = self.trending_weight(datetime.now())
+            return [(uid.decode(), score / now) for uid, score in members]
+
+        return [(uid.decode(), score) for uid, score in members]
+
+    def rating_query(self):
+        score = (self.prior_weight * self.prior_mean + Book.rating_sum) / (
+            self.prior_weight + Book.review_count
+        )
+        return select(Book.uid, Book.language, score.label("score")).where(
+            Book.review_count > 0
+        )
+
+    def trending_query(self):
+        since = datetime.now() - timedelta(seconds=TRENDING_HORIZON * self.half_life)
+        weight = func.power(
+            2, func.extract("epoch", Review.created_at - self.epoch) / self.half_life
+        )
+        return (
+            select(Book.uid, Book.language, func.sum(weight).label("score"))
+            .join(Review, Review.book_uid == Book.uid)
+            .where(Review.created_at >= since)
+            .group_by(Book.uid, Book.language)
+        )
+
+    def ranked(self, query):
+        """Keep the rows that make the top `size` of their language or overall."""
+        scored = query.subquery()
+        ranked = select(
+            scored,
+            func.row_number()
+            .over(partition_by=scored.c.language, order_by=scored.c.score.desc())
+            .label("language_rank"),
+            func.row_number().over(order_by=scored.c.score.desc()).label("rank"),
+        ).subquery()
+
+        return select(
+            ranked.c.uid,
+            ranked.c.language,
+            ranked.c.score,
+            ranked.c.language_rank <= self.size,
+            ranked.c.rank <= self.size,
+        ).where(or_(ranked.c.language_rank <= self.size, ranked.c.rank <= self.size))
+
+    async def rebuild(self, session: AsyncSession) -> dict:
+        """Recompute every board from the database and swap each one in whole.
+
+        Boards are built under a temporary key and renamed over the live one,
+        so readers never see a half-built board. Reviews recorded while the
+        rebuild runs may be missing from the new boards until they are next
+        touched.
+        """
+        boards: dict[str, dict[str, float]] = {}
+
+        for board, query in (
+            (TOP_RATED, self.rating_query()),
+            (TRENDING, self.trending_query()),
+        ):
+            result = await session.exec(self.ranked(query))
+
+            for uid, language, score, in_language, overall in result.all():
+                if in_language:
+                    boards.setdefault(self.key(board, language), {})[str(uid)] = score
+                if overall:
+                    boards.setdefault(self.key(board), {})[str(uid)] = score
+
+        redis = get_redis()
+        stale = [
+            key.decode()
+            async for key in redis.scan_iter(match="leaderboard:*")
+            if key.decode() not in boards
+        ]
+
+        async with redis.pipeline(transaction=False) as pipe:
+            for key, members in boards.items():
+                pipe.delete(f"{key}:rebuild")
+                pipe.zadd(f"{key}:rebuild", members)
+                pipe.rename(f"{key}:rebuild", key)
+            if stale:
+                pipe.delete(*stale)
+            await pipe.execute()
+
+        return {key: len(members) for key, members in boards.items()}
+
+
+leaderboards = Leaderboards(
+    size=Config.LEADERBOARD_SIZE,
+    prior_mean=Config.LEADERBOARD_PRIOR_MEAN,
+    prior_weight=Config.LEADERBOARD_PRIOR_WEIGHT,
+    half_life=timedelta(hours=Config.TRENDING_HALF_LIFE_HOURS),
+    epoch=Config.TRENDING_EPOCH,
+)
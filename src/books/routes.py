@@ -1,14 +1,37 @@
-from fastapi import APIRouter, Depends, status
+import uuid
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from typing import List
-from .schemas import Book, BookCreateModel, BookDetailModel, BookUpdateModel
+from typing import Literal, Optional
+from .schemas import (
+    Book,
+    BookCreateModel,
+    BookDetailModel,
+    BookDetailWithViews,
+    BookImportReport,
+    BookLeaderboard,
+    BookPage,
+    BookPageWithViews,
+    BookSuggestions,
+    BookUpdateModel,
+)
+from .bulk import iter_csv_rows, iter_lines, iter_ndjson_rows
+from .cache import book_detail_cache, book_flights, book_response_cache
+from .leaderboard import ALL_LANGUAGES, TOP_RATED, TRENDING, leaderboards
+from .views import merge_field, view_counter
 from .service import BookService
-from src.db.main import get_session
+from .suggest import suggest_index
+from src.db.main import async_session, get_session, read_session_scope
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.cache import etag_matches, json_response, not_modified, version_etag
+from src.config import Config
+from src.reviews.service import ReviewService
 from src.auth.dependencies import AcessTokenBearer, RoleChecker
-from src.errors import BookNotFound
+from src.errors import BookNotFound, UnsupportedMediaType
 
 book_router = APIRouter()
 book_service = BookService()
+review_service = ReviewService()
 auth_user = Depends(AcessTokenBearer())
 role_checker = Depends(RoleChecker(["user"]))
 
@@ -29,6 +52,27 @@ async def create_book(
     return new_book
 
 
+@book_router.post(
+    "/import", response_model=BookImportReport, dependencies=[role_checker]
+)
+async def import_books(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    auth_user: dict = auth_user,
+) -> dict:
+    content_type = request.headers.get("content-type", "")
+    lines = iter_lines(request.stream())
+
+    if "csv" in content_type:
+        rows = iter_csv_rows(lines)
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        rows = iter_ndjson_rows(lines)
+    else:
+        raise UnsupportedMediaType()
+
+    return await book_service.import_books(rows, auth_user.get("user")["uid"], session)
+
+
 @book_router.patch(
     "/{book_id}", response_model=Book, dependencies=[role_checker, auth_user]
 )
@@ -46,35 +90,259 @@ async def update_book(
     return book
 
 
-@book_router.get("/", response_model=List[Book], dependencies=[role_checker, auth_user])
-async def get_all_books(session: AsyncSession = Depends(get_session)) -> List[dict]:
-    books = await book_service.get_all_books(session)
-    return books
+async def render_book_page(
+    request: Request,
+    limit: int,
+    cursor: Optional[str],
+    user_uid: Optional[str] = None,
+) -> Response:
+    # a narrow query decides the page; the books are only loaded and encoded
+    # when that exact page, at those versions, has not been rendered before.
+    # Both steps are single-flight, so they open their own sessions.
+    async def load_versions():
+        async with read_session_scope() as session:
+            return await book_service.get_book_page_versions(
+                session, limit, cursor, user_uid
+            )
+
+    versions, next_cursor = await book_flights.do(
+        ("versions", user_uid, limit, cursor), load_versions
+    )
+    book_uids = [uid for uid, *_ in versions]
+    view_counts = await view_counter.get_many(book_uids)
+    key = ("books", next_cursor, *versions)
+    # counts are part of the ETag but not of the cached body, see merge_field
+    etag = version_etag(*key, *view_counts)
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+
+    async def load_page():
+        async with read_session_scope() as session:
+            books = await book_service.get_books_by_ids(book_uids, session)
 
+        payload = (
+            BookPage.model_validate(
+                {"books": books, "next_cursor": next_cursor}, from_attributes=True
+            )
+            .model_dump_json()
+            .encode()
+        )
+        book_response_cache.set(key, payload)
+        return payload
+
+    payload = book_response_cache.get(key)
+
+    if payload is None:
+        payload = await book_flights.do(key, load_page)
+
+    payload = merge_field(
+        payload, "view_counts", dict(zip(map(str, book_uids), view_counts))
+    )
+    return json_response(payload, etag)
 
-@book_router.get("/user", response_model=List[Book], dependencies=[role_checker])
+
+@book_router.get(
+    "/", response_model=BookPageWithViews, dependencies=[role_checker, auth_user]
+)
+async def get_all_books(
+    request: Request,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> Response:
+    return await render_book_page(request, limit, cursor)
+
+
+@book_router.get("/user", response_model=BookPageWithViews, dependencies=[role_checker])
 async def get_user_book_submissions(
-    session: AsyncSession = Depends(get_session), auth=auth_user
-) -> List[dict]:
-    books = await book_service.get_user_book_submission(
-        auth.get("user")["uid"], session
+    request: Request,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    auth=auth_user,
+) -> Response:
+    return await render_book_page(request, limit, cursor, auth.get("user")["uid"])
+
+
+@book_router.get("/export", dependencies=[role_checker])
+async def export_books(
+    export_format: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+) -> StreamingResponse:
+    async def stream_books():
+        # the session has to outlive the handler, so it is opened here rather
+        # than injected as a dependency
+        async with read_session_scope() as session:
+            async for chunk in book_service.export_books(session, export_format):
+                yield chunk
+
+    return StreamingResponse(
+        stream_books(),
+        media_type="text/csv" if export_format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename=books.{export_format}"},
     )
-    return books
+
+
+@book_router.get("/search", response_model=BookPage, dependencies=[role_checker])
+async def search_books(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> dict:
+    async def search():
+        async with read_session_scope() as session:
+            return await book_service.search_books(q, session, limit, cursor)
+
+    books, next_cursor = await book_flights.do(("search", q, limit, cursor), search)
+    return {"books": books, "next_cursor": next_cursor}
+
+
+@book_router.get(
+    "/suggest", response_model=BookSuggestions, dependencies=[role_checker]
+)
+async def suggest_books(
+    prefix: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=25),
+) -> dict:
+    return {"suggestions": suggest_index.suggest(prefix, limit)}
+
+
+async def render_leaderboard(board: str, language: str, limit: int) -> dict:
+    ranking = await leaderboards.top(board, language, limit)
+
+    async def load_books():
+        async with read_session_scope() as session:
+            return await book_service.get_books_by_ids(
+                [uuid.UUID(uid) for uid, _ in ranking], session
+            )
+
+    books = await book_flights.do((board, *(uid for uid, _ in ranking)), load_books)
+    scores = {str(uid): score for uid, score in ranking}
+
+    return {
+        "books": [
+            {**book.model_dump(), "score": scores[str(book.uid)]} for book in books
+        ]
+    }
+
+
+@book_router.get(
+    "/top-rated", response_model=BookLeaderboard, dependencies=[role_checker]
+)
+async def get_top_rated_books(
+    language: str = Query(default=ALL_LANGUAGES, max_length=20),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> dict:
+    return await render_leaderboard(TOP_RATED, language, limit)
+
+
+@book_router.get(
+    "/trending", response_model=BookLeaderboard, dependencies=[role_checker]
+)
+async def get_trending_books(
+    language: str = Query(default=ALL_LANGUAGES, max_length=20),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> dict:
+    return await render_leaderboard(TRENDING, language, limit)
 
 
 @book_router.get(
     "/{book_id}",
     status_code=status.HTTP_200_OK,
-    response_model=BookDetailModel,
+    response_model=BookDetailWithViews,
     dependencies=[role_checker, auth_user],
 )
-async def get_book(book_id: str, session: AsyncSession = Depends(get_session)) -> dict:
-    book = await book_service.get_book_by_id(book_id, session)
+async def get_book(book_id: str, request: Request) -> Response:
+    if_none_match = request.headers.get("if-none-match")
 
-    if not book:
+    async def load_version():
+        async with async_session() as session:
+            return await book_service.get_book_version(book_id, session)
+
+    async def load_detail():
+        # no session is opened at all when the cache answers. A miss reads the
+        # primary: writers invalidate right after their commit, and a lagging
+        # replica could otherwise put the old body back for every worker
+        async with async_session() as session:
+            version = await book_service.get_book_version(book_id, session)
+
+            if version is None:
+                return None
+
+            key = ("book", *version)
+            etag = version_etag(*key)
+            payload = book_response_cache.get(key)
+
+            if payload is None:
+                book = await book_service.get_book_detail(book_id, session)
+
+                if not book:
+                    return None
+
+                reviews, reviews_next_cursor = await review_service.get_book_reviews(
+                    book_id, session, limit=Config.BOOK_DETAIL_REVIEWS
+                )
+                payload = (
+                    BookDetailModel.model_validate(
+                        {
+                            **book.model_dump(),
+                            "user": book.user,
+                            "reviews": reviews,
+                            "reviews_next_cursor": reviews_next_cursor,
+                        },
+                        from_attributes=True,
+                    )
+                    .model_dump_json()
+                    .encode()
+                )
+                book_response_cache.set(key, payload)
+
+        return etag, payload
+
+    async def response_etag(body_etag: str) -> tuple:
+        # the count is merged in as the response goes out, and is part of the
+        # ETag, so a 304 still means the client has these exact bytes
+        view_count = await view_counter.get(uuid.UUID(book_id))
+        return version_etag(body_etag, view_count), view_count
+
+    entry = None
+
+    if if_none_match:
+        # a Redis hit carries its ETag, so a 304 needs no database work at all;
+        # on a miss a revalidation is answered from the version alone, before
+        # the detail is loaded or encoded
+        entry = await book_detail_cache.peek(book_id)
+
+        if entry is None:
+            version = await book_flights.do(("version", book_id), load_version)
+
+            if version is None:
+                raise BookNotFound()
+
+            # load_detail renders under the same key
+            etag, _ = await response_etag(version_etag("book", *version))
+
+            if etag_matches(if_none_match, etag):
+                view_counter.record(uuid.UUID(book_id))
+                return not_modified(etag)
+
+    if entry is None:
+        # concurrent requests for the same book share one lookup
+        entry = await book_flights.do(
+            ("detail", book_id),
+            lambda: book_detail_cache.get_or_load(book_id, load_detail),
+        )
+
+    # a peeked entry for a missing book has an empty etag
+    if entry is None or not entry[0]:
         raise BookNotFound()
 
-    return book
+    view_counter.record(uuid.UUID(book_id))
+    body_etag, payload = entry
+    etag, view_count = await response_etag(body_etag)
+
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    return json_response(merge_field(payload, "view_count", view_count), etag)
 
 
 @book_router.delete("/{book_id}", dependencies=[role_checker, auth_user])
@@ -1,16 +1,16 @@
 from datetime import date, datetime
 
 # from typing import Optional
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field, computed_field
 
 from src.db.models import User
 
 
 class BookReviewModel(BaseModel):
     rating: int
-    comment: str
+    comment: str = Field(validation_alias=AliasChoices("comment", "review_text"))
     created_at: datetime
 
 
@@ -22,14 +22,60 @@ class Book(BaseModel):
     page_count: int
     language: str
     created_at: datetime
-    updated_at: datetime
+    updated_at: datetime = Field(
+        validation_alias=AliasChoices("updated_at", "update_at")
+    )
+    review_count: int = 0
+    rating_sum: int = Field(default=0, exclude=True)
+    rating_histogram: List[int] = [0, 0, 0, 0, 0]
+
+    @computed_field
+    @property
+    def average_rating(self) -> Optional[float]:
+        if not self.review_count:
+            return None
+
+        return round(self.rating_sum / self.review_count, 2)
+
+
+class BookPage(BaseModel):
+    books: List[Book]
+    next_cursor: Optional[str]
+
+
+class RankedBook(Book):
+    score: float
+
+
+class BookLeaderboard(BaseModel):
+    books: List[RankedBook]
+
+
+class BookSuggestions(BaseModel):
+    suggestions: List[str]
 
 
 class BookDetailModel(Book):
+    # the newest reviews only; reviews_next_cursor continues the listing at
+    # GET /reviews/book/{book_id}
     reviews: List[BookReviewModel]
+    reviews_next_cursor: Optional[str] = None
     user: Optional[User]
 
 
+# view counts are merged into the cached bodies as they are sent, so they are
+# only part of the response models
+
+
+class BookDetailWithViews(BookDetailModel):
+    view_count: int = 0
+
+
+class BookPageWithViews(BookPage):
+    # flushed views of every book on the page, by uid
+    view_counts: Dict[str, int] = {}
+
+
 class BookCreateModel(BaseModel):
     title: str
     author: str
@@ -39,6 +85,22 @@ class BookCreateModel(BaseModel):
     published_date: str
 
 
+class BookImportModel(BookCreateModel):
+    # books.publisher is NOT NULL, so imported rows have to carry one
+    publisher: str
+
+
+class BookImportError(BaseModel):
+    row: int
+    error: str
+
+
+class BookImportReport(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BookImportError]
+
+
 class BookUpdateModel(BaseModel):
     title: str
     author: str
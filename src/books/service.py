@@ -1,27 +1,167 @@
+import csv
+import io
+import json
+import logging
+import uuid
+from typing import AsyncIterator
+from pydantic import ValidationError
+from sqlalchemy import (
+    Integer,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    or_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, array
+from sqlalchemy.exc import DBAPIError
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select, desc
+from sqlmodel import select
 
-from src.db.models import Book
-from .schemas import BookCreateModel, BookUpdateModel
-from datetime import datetime
+from src.db.loaders import BOOK_DETAIL, BOOK_SUMMARY
+from src.db.models import RATINGS, Book, Review
+from src.db.pagination import DEFAULT_PAGE_SIZE, keyset, paginate
+from src.config import Config
+from .bulk import ParsedRow
+from .cache import book_detail_cache
+from .leaderboard import leaderboards
+from .views import view_counter
+from .schemas import BookCreateModel, BookImportModel, BookUpdateModel
+from .suggest import suggest_index
+from datetime import date, datetime
+
+BOOK_KEYSET = (Book.created_at, Book.uid)
+BOOK_CURSOR = (datetime.fromisoformat, uuid.UUID)
+SEARCH_CURSOR = (float, uuid.UUID)
+SEARCH_CONFIG = "simple"
+RATING_COLUMNS = (Book.uid, Book.language, Book.review_count, Book.rating_sum)
+EXPORT_COLUMNS = (
+    Book.uid,
+    Book.title,
+    Book.author,
+    Book.publisher,
+    Book.published_date,
+    Book.page_count,
+    Book.language,
+    Book.user_uid,
+    Book.review_count,
+    Book.rating_sum,
+    Book.created_at,
+    Book.update_at,
+)
+
+
+def book_cursor_key(book: Book):
+    return book.created_at, book.uid
+
+
+def parse_published_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    )
 
 
 class BookService:
-    async def get_all_books(self, session: AsyncSession):
-        statement = select(Book).order_by(desc(Book.created_at))
+    async def get_all_books(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        statement = keyset(
+            select(Book).options(*BOOK_SUMMARY), BOOK_KEYSET, BOOK_CURSOR, limit, cursor
+        )
         result = await session.exec(statement)
-        return result.all()
+        return paginate(result.all(), limit, book_cursor_key)
 
-    async def get_user_book_submission(self, user_uid: str, session: AsyncSession):
-        result = await session.exec(
-            select(Book)
-            .where(Book.user_uid == user_uid)
-            .order_by(desc(Book.created_at))
+    async def get_user_book_submission(
+        self,
+        user_uid: str,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        statement = keyset(
+            select(Book).options(*BOOK_SUMMARY).where(Book.user_uid == user_uid),
+            BOOK_KEYSET,
+            BOOK_CURSOR,
+            limit,
+            cursor,
         )
-        return result.all()
+        result = await session.exec(statement)
+        return paginate(result.all(), limit, book_cursor_key)
 
-    async def get_book_by_id(self, book_id: str, session: AsyncSession):
-        statement = select(Book).where(Book.uid == book_id)
+    async def get_book_page_versions(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        user_uid: str | None = None,
+    ):
+        """The version of every book on a page, without loading the books."""
+        statement = select(
+            Book.uid,
+            Book.update_at,
+            Book.review_count,
+            Book.rating_sum,
+            Book.created_at,
+        )
+
+        if user_uid is not None:
+            statement = statement.where(Book.user_uid == user_uid)
+
+        statement = keyset(statement, BOOK_KEYSET, BOOK_CURSOR, limit, cursor)
+        result = await session.exec(statement)
+        rows, next_cursor = paginate(result.all(), limit, book_cursor_key)
+        versions = [
+            (row.uid, row.update_at, row.review_count, row.rating_sum) for row in rows
+        ]
+        return versions, next_cursor
+
+    async def get_books_by_ids(self, book_ids: list, session: AsyncSession):
+        statement = select(Book).options(*BOOK_SUMMARY).where(Book.uid.in_(book_ids))
+        result = await session.exec(statement)
+        books = {book.uid: book for book in result.all()}
+        return [books[book_id] for book_id in book_ids if book_id in books]
+
+    async def search_books(
+        self,
+        query: str,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        rank = func.ts_rank_cd(Book.search_vector, ts_query)
+
+        # the GIN index narrows the scan to matching rows; only those are ranked
+        statement = keyset(
+            select(Book, rank)
+            .options(*BOOK_SUMMARY)
+            .where(Book.search_vector.op("@@")(ts_query)),
+            (rank, Book.uid),
+            SEARCH_CURSOR,
+            limit,
+            cursor,
+        )
+        result = await session.exec(statement)
+        rows, next_cursor = paginate(
+            result.all(), limit, lambda row: (row[1], row[0].uid)
+        )
+        return [book for book, _ in rows], next_cursor
+
+    async def get_book_by_id(
+        self, book_id: str, session: AsyncSession, options=BOOK_SUMMARY
+    ):
+        statement = select(Book).options(*options).where(Book.uid == book_id)
         result = await session.exec(statement)
         book = result.first()
 
@@ -30,54 +170,370 @@ class BookService:
 
         return book
 
+    async def get_book_version(self, book_id: str, session: AsyncSession):
+        """(uid, update_at, review_count, rating_sum) of a book, or None.
+
+        Reviews only move the rating aggregates, not update_at, so those are
+        part of the version.
+        """
+        statement = select(
+            Book.uid, Book.update_at, Book.review_count, Book.rating_sum
+        ).where(Book.uid == book_id)
+        result = await session.exec(statement)
+        return result.first()
+
+    async def get_book_detail(self, book_id: str, session: AsyncSession):
+        return await self.get_book_by_id(book_id, session, options=BOOK_DETAIL)
+
     async def create_book(
         self, book_data: BookCreateModel, user_uid: str, session: AsyncSession
     ):
         book_data_dict = book_data.model_dump()
 
-        new_book = Book(**book_data_dict)
-
-        new_book.published_date = datetime.strptime(
-            book_data_dict["published_date"], "%Y-%m-%d"
+        book_data_dict["published_date"] = parse_published_date(
+            book_data_dict["published_date"]
         )
 
-        new_book.user_uid = user_uid
-
-        session.add(new_book)
+        statement = (
+            insert(Book).values(**book_data_dict, user_uid=user_uid).returning(Book)
+        )
+        result = await session.exec(statement)
+        new_book = result.scalars().one()
 
         await session.commit()
 
-        await session.refresh(new_book)
+        suggest_index.add(new_book.uid, new_book.title, new_book.author)
 
         return new_book
 
+    async def import_books(
+        self, rows: AsyncIterator[ParsedRow], user_uid: str, session: AsyncSession
+    ) -> dict:
+        """Validate streamed rows and insert them in batches, one transaction each.
+
+        Only the current batch is held in memory; the report keeps at most
+        BOOK_IMPORT_MAX_ERRORS error entries but counts every failure.
+        """
+        report = {"inserted": 0, "failed": 0, "errors": []}
+        batch = []
+
+        async for row_number, row, error in rows:
+            if error is None:
+                try:
+                    values = BookImportModel.model_validate(row).model_dump()
+                    values["published_date"] = parse_published_date(
+                        values["published_date"]
+                    )
+                except ValidationError as e:
+                    error = format_validation_error(e)
+                except ValueError as e:
+                    error = f"published_date: {e}"
+
+            if error is not None:
+                self._record_import_error(report, row_number, error)
+                continue
+
+            batch.append(
+                (row_number, {**values, "uid": uuid.uuid4(), "user_uid": user_uid})
+            )
+
+            if len(batch) >= Config.BOOK_IMPORT_BATCH_SIZE:
+                await self._insert_import_batch(batch, session, report)
+                batch = []
+
+        if batch:
+            await self._insert_import_batch(batch, session, report)
+
+        return report
+
+    async def _insert_import_batch(
+        self, batch: list, session: AsyncSession, report: dict
+    ) -> None:
+        rows = [values for _, values in batch]
+
+        try:
+            await session.exec(insert(Book), params=rows)
+            await session.commit()
+        except DBAPIError as e:
+            logging.error(e)
+            await session.rollback()
+
+            for row_number, _ in batch:
+                self._record_import_error(report, row_number, str(e.orig))
+            return
+
+        report["inserted"] += len(rows)
+
+        for values in rows:
+            suggest_index.add(values["uid"], values["title"], values["author"])
+
+    def _record_import_error(self, report: dict, row_number: int, error: str) -> None:
+        report["failed"] += 1
+
+        if len(report["errors"]) < Config.BOOK_IMPORT_MAX_ERRORS:
+            report["errors"].append({"row": row_number, "error": error})
+
+    async def export_books(
+        self, session: AsyncSession, export_format: str = "ndjson"
+    ) -> AsyncIterator[str]:
+        """Stream the catalog as NDJSON or CSV text, one chunk per fetched batch.
+
+        Plain column tuples come off a server-side cursor, so memory stays flat
+        however large the table is.
+        """
+        statement = select(*EXPORT_COLUMNS).execution_options(
+            yield_per=Config.BOOK_EXPORT_BATCH_SIZE
+        )
+        result = await session.stream(statement)
+
+        if export_format == "csv":
+            yield self._csv_chunk([[column.key for column in EXPORT_COLUMNS]])
+
+        async for rows in result.partitions():
+            if export_format == "csv":
+                yield self._csv_chunk(rows)
+            else:
+                yield "".join(
+                    json.dumps(row._asdict(), default=str) + "\n" for row in rows
+                )
+
+    def _csv_chunk(self, rows) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    async def record_rating(
+        self, book_uid: str, rating: int, session: AsyncSession, delta: int = 1
+    ):
+        """Move a book's rating aggregates by `delta` reviews of `rating`.
+
+        Runs inside the caller's transaction, so the aggregates commit or roll
+        back with the review itself. Edits apply -1 for the old rating and +1
+        for the new one. Returns the book's new RATING_COLUMNS row, or None if
+        there is no such book. The row lock taken here also serializes against
+        reconciliation.
+        """
+        statement = (
+            update(Book)
+            .where(Book.uid == book_uid)
+            .values(
+                {
+                    Book.review_count: Book.review_count + delta,
+                    Book.rating_sum: Book.rating_sum + rating * delta,
+                    Book.rating_histogram[rating]: Book.rating_histogram[rating]
+                    + delta,
+                }
+            )
+            .returning(*RATING_COLUMNS)
+        )
+        result = await session.exec(statement)
+        return result.first()
+
+    async def record_rating_batch(self, ratings: dict, session: AsyncSession) -> dict:
+        """Apply many reviews at once; `ratings` maps book uid to their ratings.
+
+        Books are locked in uid order first, so concurrent batches cannot
+        deadlock, and one UPDATE then moves every book's aggregates. Returns
+        the new RATING_COLUMNS row of every book that exists, by uid.
+        """
+        statement = (
+            select(Book.uid)
+            .where(Book.uid.in_(list(ratings)))
+            .order_by(Book.uid)
+            .with_for_update()
+        )
+        result = await session.exec(statement)
+        existing = set(result.all())
+
+        if not existing:
+            return {}
+
+        deltas = values(
+            column("book_uid", UUID),
+            column("review_count", Integer),
+            column("rating_sum", Integer),
+            *(column(f"rated_{rating}", Integer) for rating in RATINGS),
+            name="deltas",
+        ).data(
+            [
+                (
+                    book_uid,
+                    len(ratings[book_uid]),
+                    sum(ratings[book_uid]),
+                    *(ratings[book_uid].count(rating) for rating in RATINGS),
+                )
+                for book_uid in existing
+            ]
+        )
+        statement = (
+            update(Book)
+            .where(Book.uid == deltas.c.book_uid)
+            .values(
+                review_count=Book.review_count + deltas.c.review_count,
+                rating_sum=Book.rating_sum + deltas.c.rating_sum,
+                rating_histogram=array(
+                    [
+                        Book.rating_histogram[rating] + deltas.c[f"rated_{rating}"]
+                        for rating in RATINGS
+                    ]
+                ),
+            )
+            .returning(*RATING_COLUMNS)
+        )
+        result = await session.exec(statement)
+        return {row.uid: row for row in result.all()}
+
+    async def reconcile_rating_aggregates(
+        self,
+        session: AsyncSession,
+        batch_size: int = Config.RATING_RECONCILE_BATCH_SIZE,
+    ) -> int:
+        """Rebuild the rating aggregates from reviews; returns the books corrected.
+
+        Books are locked a batch at a time before their reviews are counted, so
+        a review committed concurrently is either counted here or waits and
+        applies its increment on top.
+        """
+        corrected = 0
+        last_uid = None
+
+        while True:
+            statement = select(Book.uid).order_by(Book.uid).limit(batch_size)
+
+            if last_uid is not None:
+                statement = statement.where(Book.uid > last_uid)
+
+            result = await session.exec(statement.with_for_update())
+            book_uids = result.all()
+
+            if not book_uids:
+                break
+
+            stats = (
+                select(
+                    Book.uid.label("book_uid"),
+                    func.count(Review.uid).label("review_count"),
+                    func.coalesce(func.sum(Review.rating), 0).label("rating_sum"),
+                    # count() is bigint and int[] does not compare with bigint[]
+                    cast(
+                        array(
+                            [
+                                func.count(Review.uid).filter(Review.rating == rating)
+                                for rating in RATINGS
+                            ]
+                        ),
+                        ARRAY(Integer),
+                    ).label("rating_histogram"),
+                )
+                .select_from(Book)
+                .outerjoin(Review, Review.book_uid == Book.uid)
+                .where(Book.uid.in_(book_uids))
+                .group_by(Book.uid)
+                .subquery()
+            )
+            statement = (
+                update(Book)
+                .where(Book.uid == stats.c.book_uid)
+                .where(
+                    or_(
+                        Book.review_count != stats.c.review_count,
+                        Book.rating_sum != stats.c.rating_sum,
+                        Book.rating_histogram != stats.c.rating_histogram,
+                    )
+                )
+                .values(
+                    review_count=stats.c.review_count,
+                    rating_sum=stats.c.rating_sum,
+                    rating_histogram=stats.c.rating_histogram,
+                )
+                .returning(*RATING_COLUMNS)
+            )
+            result = await session.exec(statement)
+            corrected_books = result.all()
+            await session.commit()
+
+            for book in corrected_books:
+                await book_detail_cache.invalidate(book.uid)
+                await leaderboards.record(
+                    book.uid,
+                    book.language,
+                    book.review_count,
+                    book.rating_sum,
+                    reviews=0,
+                )
+
+            corrected += len(corrected_books)
+            last_uid = book_uids[-1]
+
+        return corrected
+
     async def update_book(
         self, book_id: str, book_update_data: BookUpdateModel, session: AsyncSession
     ):
-        book_to_update = await self.get_book_by_id(book_id, session)
+        book_update_data = book_update_data.model_dump()
 
-        if not book_to_update:
-            return None
+        book_update_data["published_date"] = parse_published_date(
+            book_update_data["published_date"]
+        )
 
-        book_update_data = book_update_data.model_dump()
+        # the language picks the book's leaderboards, so the old one is needed
+        result = await session.exec(
+            select(Book.language).where(Book.uid == book_id).with_for_update()
+        )
+        old_language = result.first()
 
-        for key, value in book_update_data.items():
-            # if key == "published_date":
-            #     value = datetime.strptime(value, "%Y-%m-%d")
-            setattr(book_to_update, key, value)
+        statement = (
+            update(Book)
+            .where(Book.uid == book_id)
+            .values(**book_update_data, update_at=datetime.now())
+            .returning(Book)
+        )
+        result = await session.exec(statement)
+        book_to_update = result.scalars().first()
 
         await session.commit()
 
-        return book_to_update
+        if book_to_update:
+            await book_detail_cache.invalidate(book_to_update.uid)
 
-    async def delete_book(self, book_id: str, session: AsyncSession):
-        book_to_delete = await self.get_book_by_id(book_id, session)
+            if book_to_update.language != old_language:
+                await leaderboards.move(
+                    book_to_update.uid,
+                    old_language,
+                    book_to_update.language,
+                    book_to_update.review_count,
+                    book_to_update.rating_sum,
+                )
 
-        if not book_to_delete:
-            return None
+            suggest_index.add(
+                book_to_update.uid, book_to_update.title, book_to_update.author
+            )
+
+        return book_to_update
 
-        session.delete(book_to_delete)
+    async def delete_book(self, book_id: str, session: AsyncSession):
+        # reviews keep their rows but lose the reference, in the same statement
+        detach_reviews = (
+            update(Review)
+            .where(Review.book_uid == book_id)
+            .values(book_uid=None)
+            .cte("detach_reviews")
+        )
+        statement = (
+            delete(Book)
+            .where(Book.uid == book_id)
+            .returning(Book)
+            .add_cte(detach_reviews)
+        )
+        result = await session.exec(statement)
+        book_to_delete = result.scalars().first()
 
         await session.commit()
 
+        if book_to_delete:
+            await book_detail_cache.invalidate(book_to_delete.uid)
+            await leaderboards.remove(book_to_delete.uid, book_to_delete.language)
+            await view_counter.forget(book_to_delete.uid)
+            suggest_index.remove(book_to_delete.uid)
+
         return book_to_delete
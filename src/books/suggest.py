@@ -0,0 +1,113 @@
+import bisect
+import logging
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.models import Book
+
+
+class PrefixIndex:
+    """Per-process typeahead index over book titles and authors.
+
+    Distinct (term, text) pairs live in one sorted list, reference counted
+    across books, so a lookup is a binary search followed by a scan of at most
+    `limit` entries. `max_entries` caps the number of distinct pairs kept.
+    """
+
+    def __init__(self, max_entries: int, max_length: int):
+        self.max_entries = max_entries
+        self.max_length = max_length
+        self.entries: list[tuple[str, str]] = []
+        self.counts: dict[tuple[str, str], int] = {}
+        self.by_book: dict[str, tuple[tuple[str, str], ...]] = {}
+
+    def normalize(self, text: str) -> str:
+        return " ".join(text.casefold().split())[: self.max_length]
+
+    def terms(self, title: str, author: str) -> tuple[tuple[str, str], ...]:
+        return tuple(
+            (self.normalize(text), text[: self.max_length])
+            for text in {title, author}
+            if text and text.strip()
+        )
+
+    async def build(self, session: AsyncSession) -> None:
+        counts: dict[tuple[str, str], int] = {}
+        by_book = {}
+
+        result = await session.stream(
+            select(Book.uid, Book.title, Book.author).execution_options(
+                yield_per=Config.SUGGEST_BUILD_BATCH_SIZE
+            )
+        )
+        async for uid, title, author in result:
+            kept = []
+
+            for term in self.terms(title, author):
+                if term in counts or len(counts) < self.max_entries:
+                    counts[term] = counts.get(term, 0) + 1
+                    kept.append(term)
+
+            by_book[str(uid)] = tuple(kept)
+
+        # sorting once is far cheaper than inserting row by row
+        self.entries = sorted(counts)
+        self.counts = counts
+        self.by_book = by_book
+
+        if len(counts) >= self.max_entries:
+            logging.warning(f"suggestion index is full at {self.max_entries} entries")
+
+    def add(self, uid, title: str, author: str) -> None:
+        self.remove(uid)
+        kept = []
+
+        for term in self.terms(title, author):
+            count = self.counts.get(term, 0)
+
+            if count == 0:
+                if len(self.counts) >= self.max_entries:
+                    continue
+                bisect.insort(self.entries, term)
+
+            self.counts[term] = count + 1
+            kept.append(term)
+
+        self.by_book[str(uid)] = tuple(kept)
+
+    def remove(self, uid) -> None:
+        for term in self.by_book.pop(str(uid), ()):
+            count = self.counts[term]
+
+            if count > 1:
+                self.counts[term] = count - 1
+            else:
+                del self.counts[term]
+                index = bisect.bisect_left(self.entries, term)
+                del self.entries[index]
+
+    def suggest(self, prefix: str, limit: int) -> list[str]:
+        prefix = self.normalize(prefix)
+        index = bisect.bisect_left(self.entries, (prefix,))
+        suggestions = []
+
+        while index < len(self.entries) and len(suggestions) < limit:
+            term, text = self.entries[index]
+
+            if not term.startswith(prefix):
+                break
+
+            suggestions.append(text)
+            index += 1
+
+        return suggestions
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+suggest_index = PrefixIndex(
+    max_entries=Config.SUGGEST_MAX_ENTRIES, max_length=Config.SUGGEST_MAX_LENGTH
+)
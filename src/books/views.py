@@ -0,0 +1,125 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import Counter
+
+from src.config import Config
+from src.db.redis import get_redis
+
+
+class ViewCounter:
+    """Per-process book view counts, flushed to Redis in batches.
+
+    Views only bump an in-memory counter, so the read path never writes.
+    Every `interval` seconds the pending deltas are applied with pipelined
+    HINCRBYs over `shards` Redis hashes, keyed by a stable hash of the book uid
+    so no single hash grows with the whole catalog. A failed flush keeps its
+    deltas for the next one.
+    """
+
+    def __init__(self, shards: int, interval: float):
+        self.shards = shards
+        self.interval = interval
+        self.pending: Counter = Counter()
+        self.closing = asyncio.Event()
+        self.flushes = 0
+        self.failures = 0
+
+    def shard_key(self, book_uid: str) -> str:
+        return f"book_views:{uuid.UUID(book_uid).int % self.shards}"
+
+    def record(self, book_uid) -> None:
+        self.pending[str(book_uid)] += 1
+
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+
+        # swapping is enough: nothing else touches the counter while this runs
+        pending, self.pending = self.pending, Counter()
+
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for book_uid, views in pending.items():
+                    pipe.hincrby(self.shard_key(book_uid), book_uid, views)
+                await pipe.execute()
+        except Exception as e:
+            logging.error(f"view count flush failed: {e}")
+            self.failures += 1
+            self.pending.update(pending)
+            return
+
+        self.flushes += 1
+
+    async def run(self) -> None:
+        while not self.closing.is_set():
+            try:
+                await asyncio.wait_for(self.closing.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+            await self.flush()
+
+    async def close(self, flusher: asyncio.Task) -> None:
+        """Wake the flusher for a last flush and wait for it to finish."""
+        self.closing.set()
+        await flusher
+
+    async def get(self, book_uid) -> int:
+        """Views flushed so far by every process; pending ones are not counted."""
+        (views,) = await self.get_many([book_uid])
+        return views
+
+    async def get_many(self, book_uids: list) -> list[int]:
+        """Flushed views of each book, in order, in one round trip."""
+        book_uids = [str(book_uid) for book_uid in book_uids]
+
+        if not book_uids:
+            return []
+
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for book_uid in book_uids:
+                    pipe.hget(self.shard_key(book_uid), book_uid)
+                views = await pipe.execute()
+        except Exception as e:
+            logging.error(e)
+            return [0] * len(book_uids)
+
+        return [int(count or 0) for count in views]
+
+    async def forget(self, book_uid) -> None:
+        book_uid = str(book_uid)
+        self.pending.pop(book_uid, None)
+
+        try:
+            await get_redis().hdel(self.shard_key(book_uid), book_uid)
+        except Exception as e:
+            logging.error(e)
+
+    def stats(self) -> dict:
+        return {
+            "pending_books": len(self.pending),
+            "pending_views": sum(self.pending.values()),
+            "flushes": self.flushes,
+            "failures": self.failures,
+        }
+
+
+def merge_field(payload: bytes, name: str, value) -> bytes:
+    """Append a field to an encoded JSON object without decoding it.
+
+    Cached bodies stay free of view counts, which change far more often than
+    the books do; the counts are merged in as the response goes out.
+    """
+    return b"%s,%s:%s}" % (
+        payload[:-1],
+        json.dumps(name).encode(),
+        json.dumps(value).encode(),
+    )
+
+
+view_counter = ViewCounter(
+    shards=Config.VIEW_COUNTER_SHARDS, interval=Config.VIEW_FLUSH_INTERVAL
+)
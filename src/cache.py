@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from fastapi import Response, status
+
+
+class LRUCache:
+    """Bounded least-recently-used cache whose entries may carry an expiry.
+
+    `expires_at` is a unix timestamp so entries can share the clock used by
+    JWT `exp` claims. Hit and miss counters feed the metrics endpoints.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.entries.get(key)
+
+        if entry is not None:
+            value, expires_at = entry
+
+            if expires_at is None or expires_at > time.time():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+            del self.entries[key]
+
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, expires_at: float | None = None) -> None:
+        self.entries[key] = (value, expires_at)
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls in this process onto one task.
+
+    The first caller for a key starts the call; callers arriving while it is
+    in flight await the same result or exception. The task is shielded so a
+    caller going away does not cancel it for the others, which also means the
+    call must not borrow that caller's session.
+    """
+
+    def __init__(self):
+        self.calls: dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self.calls.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self.calls[key] = task
+            self.started += 1
+            task.add_done_callback(lambda done: self.forget(key, done))
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self.calls.get(key) is task:
+            del self.calls[key]
+
+        # keep an exception nobody awaited from being logged as never retrieved
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self.calls),
+            "started": self.started,
+            "shared": self.shared,
+        }
+
+
+def version_etag(*version: Any) -> str:
+    """Strong ETag for a resource identified by the parts of its version."""
+    digest = hashlib.blake2b(
+        "|".join(str(part) for part in version).encode(), digest_size=16
+    )
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so a W/ prefix is ignored
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def json_response(payload: bytes, etag: str) -> Response:
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
@@ -1,7 +1,11 @@
 from celery import Celery
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.books.service import BookService
+from src.db.main import create_db_engine
+from src.db.redis import close_redis
 from src.mail import mail, create_message
 from asgiref.sync import async_to_sync
-from .config import broker_url, result_backend
+from .config import Config, broker_url, result_backend
 
 c_app = Celery()
 
@@ -18,3 +22,22 @@ def send_email(recipients: list[str], subject: str, body: str):
 
     async_to_sync(mail.send_message)(message)
     print("Email sent")
+
+
+@c_app.task(name="reconcile_rating_aggregates")
+def reconcile_rating_aggregates():
+    async def reconcile() -> int:
+        # a worker runs each task on a fresh event loop, so it cannot share the
+        # API's pooled engine, and the Redis client that cache invalidation and
+        # the leaderboards use has to be closed before that loop goes away
+        engine = create_db_engine(Config.DATABASE_URL)
+
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                return await BookService().reconcile_rating_aggregates(session)
+        finally:
+            await engine.dispose()
+            await close_redis()
+
+    corrected = async_to_sync(reconcile)()
+    print(f"Rating aggregates corrected on {corrected} books")
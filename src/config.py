@@ -1,11 +1,27 @@
+from datetime import datetime
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # comma separated list of read replica urls
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_HEALTH_INTERVAL: int = 10
+    DB_REPLICA_HEALTH_TIMEOUT: int = 3
     JWT_SECRET: str
     JWT_ALGORITHM: str
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: int = 5
     # REDIS_HOST: str = "localhost"
     # REDIS_PORT: int = 6379
 
@@ -21,6 +37,55 @@ class Settings(BaseSettings):
     VALIDATE_CERTS: bool = True
     BASE_URL: str
 
+    TOKEN_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: int = 30
+    PRINCIPAL_REDIS_TTL: int = 300
+    PRINCIPAL_CACHE_USE_REDIS: bool = False
+
+    SUGGEST_MAX_ENTRIES: int = 1_000_000
+    SUGGEST_MAX_LENGTH: int = 100
+    SUGGEST_BUILD_BATCH_SIZE: int = 5000
+
+    BOOK_IMPORT_BATCH_SIZE: int = 1000
+    BOOK_IMPORT_MAX_ERRORS: int = 1000
+    # longer lines, or quoted records spanning lines, are rejected as one row
+    BOOK_IMPORT_MAX_ROW_LENGTH: int = 65536
+    BOOK_EXPORT_BATCH_SIZE: int = 2000
+
+    BOOK_CACHE_TTL: int = 300
+    BOOK_CACHE_TTL_JITTER: int = 60
+    BOOK_CACHE_MISSING_TTL: int = 5
+    BOOK_CACHE_LOCK_TIMEOUT: float = 5
+    BOOK_CACHE_LOCK_WAIT: float = 2
+    BOOK_RESPONSE_CACHE_SIZE: int = 5000
+    BOOK_DETAIL_REVIEWS: int = 10
+
+    RATING_RECONCILE_BATCH_SIZE: int = 1000
+
+    LEADERBOARD_SIZE: int = 1000
+    LEADERBOARD_PRIOR_MEAN: float = 3.0
+    LEADERBOARD_PRIOR_WEIGHT: float = 10
+    TRENDING_HALF_LIFE_HOURS: float = 72
+    # trending scores grow by 2x per half-life from this point; doubles hold
+    # about a thousand half-lives, so move it forward and rebuild every few years
+    TRENDING_EPOCH: datetime = datetime(2026, 1, 1)
+
+    VIEW_COUNTER_SHARDS: int = 16
+    VIEW_FLUSH_INTERVAL: float = 5
+
+    # "direct" writes each review in its own transaction; "buffered" queues it
+    # for the batch flusher and acknowledges once it is "enqueued" or "flushed"
+    REVIEW_INGEST_MODE: Literal["direct", "buffered"] = "direct"
+    REVIEW_INGEST_ACK: Literal["enqueued", "flushed"] = "flushed"
+    REVIEW_BUFFER_SIZE: int = 10000
+    REVIEW_FLUSH_BATCH_SIZE: int = 500
+    REVIEW_FLUSH_INTERVAL: float = 0.01
+    REVIEW_BUFFER_CLOSE_TIMEOUT: float = 10
+
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
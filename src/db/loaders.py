@@ -0,0 +1,19 @@
+from sqlalchemy.orm import defer, noload, selectinload
+
+from src.db.models import Book, User
+
+# Relationship loading is declared per query rather than on the models, so
+# list pages, existence checks and auth lookups never pull child collections.
+# A book's reviews are paged separately, never loaded as a whole. The search
+# vector is only ever used inside the database.
+
+BOOK_SUMMARY = (noload(Book.reviews), noload(Book.user), defer(Book.search_vector))
+
+BOOK_DETAIL = (noload(Book.reviews), selectinload(Book.user), defer(Book.search_vector))
+
+USER_SUMMARY = (noload(User.books), noload(User.reviews))
+
+USER_PROFILE = (
+    selectinload(User.books).defer(Book.search_vector),
+    selectinload(User.reviews),
+)
@@ -1,15 +1,136 @@
-from typing import AsyncGenerator
-from sqlmodel import SQLModel, create_engine
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, List
+from sqlmodel import SQLModel, create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from src.config import Config
 
-engine = AsyncEngine(
-    create_engine(
-        url=Config.DATABASE_URL,
-        echo=True,
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait to check out a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+
+def create_db_engine(url: str) -> AsyncEngine:
+    return AsyncEngine(
+        create_engine(
+            url=url,
+            echo=Config.DB_ECHO,
+            poolclass=InstrumentedQueuePool,
+            pool_size=Config.DB_POOL_SIZE,
+            max_overflow=Config.DB_MAX_OVERFLOW,
+            pool_timeout=Config.DB_POOL_TIMEOUT,
+            pool_recycle=Config.DB_POOL_RECYCLE,
+            pool_pre_ping=Config.DB_POOL_PRE_PING,
+            connect_args={
+                "statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+                "prepared_statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+            },
+        )
     )
+
+
+def db_pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "wait_avg": pool.wait_total / pool.checkouts if pool.checkouts else 0.0,
+        "wait_max": pool.wait_max,
+    }
+
+
+class ReplicaRouter:
+    """Spreads read-only sessions round-robin across healthy replicas.
+
+    Replicas are marked unhealthy when a health check or a session checkout
+    fails, and marked healthy again by the next successful health check.
+    `pick` returns None when no replica can serve, so callers use the primary.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.engines = [create_db_engine(url) for url in urls]
+        self.session_factories = [
+            sessionmaker(bind=replica, class_=AsyncSession, expire_on_commit=False)
+            for replica in self.engines
+        ]
+        self.healthy = [True] * len(self.engines)
+        self.position = 0
+
+    def pick(self) -> int | None:
+        for _ in range(len(self.engines)):
+            index = self.position
+            self.position = (self.position + 1) % len(self.engines)
+
+            if self.healthy[index]:
+                return index
+
+        return None
+
+    async def check(self) -> None:
+        for index, replica in enumerate(self.engines):
+            try:
+                async with asyncio.timeout(Config.DB_REPLICA_HEALTH_TIMEOUT):
+                    async with replica.connect() as conn:
+                        await conn.execute(text("SELECT 1"))
+                self.healthy[index] = True
+            except Exception as e:
+                logging.error(f"replica {index} failed health check: {e}")
+                self.healthy[index] = False
+
+    async def monitor(self) -> None:
+        while self.engines:
+            await self.check()
+            await asyncio.sleep(Config.DB_REPLICA_HEALTH_INTERVAL)
+
+    async def dispose(self) -> None:
+        for replica in self.engines:
+            await replica.dispose()
+
+    def stats(self) -> List[dict]:
+        return [
+            {"healthy": healthy, "pool": db_pool_stats(replica)}
+            for healthy, replica in zip(self.healthy, self.engines)
+        ]
+
+
+engine = create_db_engine(Config.DATABASE_URL)
+
+async_session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in Config.DATABASE_REPLICA_URLS.split(",") if url.strip()]
 )
 
 
@@ -20,7 +141,34 @@ async def init_db():
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with async_session() as session:
+        yield session
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only endpoints; writes must keep using get_session."""
+    session = None
+    index = replica_router.pick()
+
+    if index is not None:
+        session = replica_router.session_factories[index]()
+        try:
+            # check out the connection now so a dead replica falls back to the
+            # primary instead of failing the request on its first query
+            await session.connection()
+        except Exception as e:
+            logging.error(f"replica {index} unavailable: {e}")
+            replica_router.healthy[index] = False
+            await session.close()
+            session = None
 
-    async with Session() as session:
+    if session is None:
+        session = async_session()
+
+    async with session:
         yield session
+
+
+# for reads outside a request dependency: streaming bodies, which outlive the
+# handler, and cache loaders that only need the database on a miss
+read_session_scope = asynccontextmanager(get_read_session)
@@ -3,11 +3,20 @@ from datetime import date, datetime
 from typing import List, Optional
 
 import sqlalchemy.dialects.postgresql as pg
-from sqlmodel import Column, Field, Relationship, SQLModel
+from sqlmodel import Column, Computed, Field, Index, Relationship, SQLModel
+
+RATINGS = range(1, 6)
+
+BOOK_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(publisher, '')), 'C')"
+)
 
 
 class User(SQLModel, table=True):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_email", "email", unique=True),)
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
@@ -24,12 +33,8 @@ class User(SQLModel, table=True):
     )
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     update_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
-    books: List["Book"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
-    )
-    reviews: List["Review"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
-    )
+    books: List["Book"] = Relationship(back_populates="user")
+    reviews: List["Review"] = Relationship(back_populates="user")
 
     def __repr__(self):
         return f"<User {self.username}>"
@@ -59,6 +64,11 @@ class User(SQLModel, table=True):
 
 class Book(SQLModel, table=True):
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_created_at_uid", "created_at", "uid"),
+        Index("ix_books_user_uid_created_at_uid", "user_uid", "created_at", "uid"),
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+    )
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
@@ -71,10 +81,27 @@ class Book(SQLModel, table=True):
     user_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="users.uid")
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     update_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
-    user: Optional[User] = Relationship(back_populates="books")
-    reviews: List["Review"] = Relationship(
-        back_populates="book", sa_relationship_kwargs={"lazy": "selectin"}
+    search_vector: Optional[str] = Field(
+        default=None,
+        sa_column=Column(pg.TSVECTOR, Computed(BOOK_SEARCH_DOCUMENT, persisted=True)),
+        exclude=True,
     )
+    # kept in step with reviews by ReviewService; rating_histogram[n - 1] counts
+    # the reviews rated n
+    review_count: int = Field(
+        default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0")
+    )
+    rating_sum: int = Field(
+        default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0")
+    )
+    rating_histogram: List[int] = Field(
+        default_factory=lambda: [0] * len(RATINGS),
+        sa_column=Column(
+            pg.ARRAY(pg.INTEGER), nullable=False, server_default="{0,0,0,0,0}"
+        ),
+    )
+    user: Optional[User] = Relationship(back_populates="books")
+    reviews: List["Review"] = Relationship(back_populates="book")
     # tags: List[Tag] = Relationship(
     #     link_model=BookTag,
     #     back_populates="books",
@@ -87,6 +114,10 @@ class Book(SQLModel, table=True):
 
 class Review(SQLModel, table=True):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_book_uid_created_at_uid", "book_uid", "created_at", "uid"),
+        Index("ix_reviews_user_uid", "user_uid"),
+    )
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
@@ -0,0 +1,50 @@
+import base64
+import binascii
+import json
+from typing import Any, Callable, Sequence, Tuple
+
+from sqlalchemy import desc, tuple_
+
+from src.errors import InvalidCursor
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(*keys: Any) -> str:
+    payload = json.dumps([str(key) for key in keys]).encode()
+
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[str], Any]) -> Tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        keys = json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+        if not isinstance(keys, list) or len(keys) != len(parsers):
+            raise InvalidCursor()
+
+        return tuple(parse(key) for parse, key in zip(parsers, keys))
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor()
+
+
+def keyset(statement, columns: Sequence, parsers: Sequence, limit: int, cursor=None):
+    """Order a statement newest first on `columns` and resume after `cursor`.
+
+    One extra row is fetched so `paginate` can tell whether a next page exists.
+    """
+    if cursor:
+        statement = statement.where(
+            tuple_(*columns) < tuple_(*decode_cursor(cursor, *parsers))
+        )
+
+    return statement.order_by(*(desc(column) for column in columns)).limit(limit + 1)
+
+
+def paginate(rows: Sequence, limit: int, key: Callable[[Any], Tuple]):
+    items = list(rows[:limit])
+    next_cursor = encode_cursor(*key(items[-1])) if len(rows) > limit else None
+
+    return items, next_cursor
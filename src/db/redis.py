@@ -1,16 +1,178 @@
-import redis
+import asyncio
+import logging
+import time
+
+import redis.asyncio as aioredis
 from src.config import Config
 
 JTI_EXPIRY = 3600
+BLOCKLIST_CHANNEL = "bookly:blocklist"
+BLOCKLIST_INDEX = "bookly:blocklist:index"
+BLOCKLIST_RETRY_DELAY = 5
+BLOCKLIST_PRUNE_INTERVAL = 60
+# an idle subscription is pinged this often, and dropped once nothing at all
+# has arrived for the timeout, so a half-open connection cannot go unnoticed
+BLOCKLIST_HEARTBEAT_INTERVAL = 5
+BLOCKLIST_HEARTBEAT_TIMEOUT = 15
+
+redis_pool: aioredis.BlockingConnectionPool | None = None
+redis_client: aioredis.Redis | None = None
+
+
+def init_redis() -> aioredis.Redis:
+    global redis_pool, redis_client
+
+    redis_pool = aioredis.BlockingConnectionPool.from_url(
+        url=Config.REDIS_URL,
+        max_connections=Config.REDIS_MAX_CONNECTIONS,
+        timeout=Config.REDIS_POOL_TIMEOUT,
+    )
+    redis_client = aioredis.Redis(connection_pool=redis_pool)
+
+    return redis_client
+
+
+def get_redis() -> aioredis.Redis:
+    # the pool is normally created by the life_span hook; scripts and tests
+    # that never start the app get one lazily on first use
+    if redis_client is None:
+        return init_redis()
+
+    return redis_client
+
+
+async def close_redis() -> None:
+    global redis_pool, redis_client
+
+    if redis_client is not None:
+        await redis_client.aclose()
+        await redis_pool.disconnect()
+
+    redis_pool = None
+    redis_client = None
+
+
+def redis_pool_stats() -> dict:
+    if redis_pool is None:
+        return {"max_connections": Config.REDIS_MAX_CONNECTIONS, "created": 0}
+
+    in_use = len(redis_pool._in_use_connections)
+    idle = len(redis_pool._available_connections)
+
+    return {
+        "max_connections": redis_pool.max_connections,
+        "created": in_use + idle,
+        "in_use": in_use,
+        "idle": idle,
+    }
+
+
+class RevokedTokenCache:
+    """Per-process copy of the revoked jtis, kept current over Redis pub/sub.
+
+    The set only holds tokens revoked within the last JTI_EXPIRY seconds, so it
+    stays small. While `ready` is false (not yet subscribed, or the
+    subscription dropped or went silent) lookups must fall back to Redis.
+    """
+
+    def __init__(self):
+        self.revoked: dict[str, float] = {}
+        self.ready = False
+        self.last_pruned = time.time()
+
+    def __contains__(self, jti: str) -> bool:
+        expires_at = self.revoked.get(jti)
 
-token_block_list = redis.Redis.from_url(url=Config.REDIS_URL)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self) -> int:
+        return len(self.revoked)
+
+    def add(self, jti: str, expires_at: float) -> None:
+        self.revoked[jti] = expires_at
+
+        if time.time() - self.last_pruned > BLOCKLIST_PRUNE_INTERVAL:
+            self.prune()
+
+    def prune(self) -> None:
+        now = time.time()
+        self.revoked = {
+            jti: expires_at
+            for jti, expires_at in self.revoked.items()
+            if expires_at > now
+        }
+        self.last_pruned = now
+
+    def reset(self, revoked: dict[str, float]) -> None:
+        self.revoked = revoked
+        self.last_pruned = time.time()
+
+
+revoked_tokens = RevokedTokenCache()
+
+
+async def listen_for_revocations() -> None:
+    while True:
+        pubsub = get_redis().pubsub()
+        try:
+            # subscribe before taking the snapshot so no revocation published
+            # in between can be missed
+            await pubsub.subscribe(BLOCKLIST_CHANNEL)
+            message = await pubsub.get_message(timeout=BLOCKLIST_RETRY_DELAY)
+
+            if message is None or message["type"] != "subscribe":
+                raise ConnectionError("blocklist subscription was not confirmed")
+
+            await get_redis().zremrangebyscore(BLOCKLIST_INDEX, "-inf", time.time())
+            entries = await get_redis().zrange(BLOCKLIST_INDEX, 0, -1, withscores=True)
+            revoked_tokens.reset({jti.decode(): score for jti, score in entries})
+            revoked_tokens.ready = True
+
+            last_seen = time.monotonic()
+
+            while True:
+                message = await pubsub.get_message(timeout=BLOCKLIST_HEARTBEAT_INTERVAL)
+
+                if message is None:
+                    if time.monotonic() - last_seen > BLOCKLIST_HEARTBEAT_TIMEOUT:
+                        raise ConnectionError("blocklist subscription went silent")
+
+                    await pubsub.ping()
+                    continue
+
+                last_seen = time.monotonic()
+
+                if message["type"] == "message":
+                    jti, expires_at = message["data"].decode().split()
+                    revoked_tokens.add(jti, float(expires_at))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(e)
+        finally:
+            revoked_tokens.ready = False
+            await pubsub.aclose()
+
+        await asyncio.sleep(BLOCKLIST_RETRY_DELAY)
 
 
 async def add_jti_to_block_list(jti: str) -> None:
-    token_block_list.set(name=jti, value="", ex=JTI_EXPIRY)
+    expires_at = time.time() + JTI_EXPIRY
+
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.set(name=jti, value="", ex=JTI_EXPIRY)
+        pipe.zadd(BLOCKLIST_INDEX, {jti: expires_at})
+        pipe.zremrangebyscore(BLOCKLIST_INDEX, "-inf", time.time())
+        pipe.publish(BLOCKLIST_CHANNEL, f"{jti} {expires_at}")
+        await pipe.execute()
+
+    revoked_tokens.add(jti, expires_at)
 
 
 async def token_in_blocklist(jti: str) -> bool:
-    result = token_block_list.get(jti)
+    if revoked_tokens.ready:
+        return jti in revoked_tokens
+
+    result = await get_redis().get(jti)
 
     return result is not None
@@ -65,6 +65,24 @@ class UserNotFound(BooklyException):
     pass
 
 
+class InvalidCursor(BooklyException):
+    """User has provided a malformed pagination cursor"""
+
+    pass
+
+
+class UnsupportedMediaType(BooklyException):
+    """User has sent a request body in a format the endpoint does not accept"""
+
+    pass
+
+
+class ServiceBusy(BooklyException):
+    """Server has too much queued work to accept the request right now"""
+
+    pass
+
+
 class AccountNotVerified(Exception):
     """Account not yet verified"""
 
@@ -202,6 +220,42 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "status": False,
+                "code": status.HTTP_400_BAD_REQUEST,
+                "message": "Invalid pagination cursor",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        UnsupportedMediaType,
+        create_exception_handler(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            initial_detail={
+                "status": False,
+                "code": status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                "message": "Unsupported content type, send text/csv or application/x-ndjson",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        ServiceBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "status": False,
+                "code": status.HTTP_503_SERVICE_UNAVAILABLE,
+                "message": "Server is busy, please try again shortly",
+            },
+        ),
+    )
+
     app.add_exception_handler(
         AccountNotVerified,
         create_exception_handler(
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, status
+
+from src.auth.cache import principal_cache
+from src.auth.utils import token_cache
+from src.books.cache import book_detail_cache, book_flights, book_response_cache
+from src.books.views import view_counter
+from src.db.main import db_pool_stats, engine, replica_router
+from src.db.redis import redis_pool_stats, revoked_tokens
+from src.reviews.buffer import review_buffer
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/db", status_code=status.HTTP_200_OK)
+async def get_db_metrics() -> dict:
+    return {"pool": db_pool_stats(engine), "replicas": replica_router.stats()}
+
+
+@metrics_router.get("/redis", status_code=status.HTTP_200_OK)
+async def get_redis_metrics() -> dict:
+    return {
+        "pool": redis_pool_stats(),
+        "revoked_tokens": {
+            "subscribed": revoked_tokens.ready,
+            "cached": len(revoked_tokens),
+        },
+        "views": view_counter.stats(),
+    }
+
+
+@metrics_router.get("/cache", status_code=status.HTTP_200_OK)
+async def get_cache_metrics() -> dict:
+    return {
+        "tokens": token_cache.stats(),
+        "principals": principal_cache.local.stats(),
+        "book_detail": book_detail_cache.stats(),
+        "book_responses": book_response_cache.stats(),
+        "book_flights": book_flights.stats(),
+    }
+
+
+@metrics_router.get("/reviews", status_code=status.HTTP_200_OK)
+async def get_review_metrics() -> dict:
+    return {"buffer": review_buffer.stats()}
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import logging
+from collections import Counter, defaultdict
+from typing import Optional
+
+from src.books.cache import book_detail_cache
+from src.books.leaderboard import leaderboards
+from src.books.service import BookService
+from src.config import Config
+from src.db.main import async_session
+from src.db.models import Review
+from src.db.redis import get_redis
+from src.errors import BookNotFound, InternalServerError, ServiceBusy
+
+book_service = BookService()
+
+DEAD_LETTER_KEY = "reviews:dead_letter"
+
+
+class ReviewBuffer:
+    """Write-behind buffer that stores accepted reviews in multi-row batches.
+
+    Submitters only enqueue; one flusher task per process waits `interval`
+    after the first queued review, then writes up to `batch_size` of them and
+    their rating aggregates in a single transaction. A batch that fails is
+    retried a review at a time, and reviews that still fail are pushed to the
+    DEAD_LETTER_KEY list in Redis, as are any left queued at shutdown. A full
+    queue rejects new reviews with ServiceBusy.
+    """
+
+    def __init__(
+        self, maxsize: int, batch_size: int, interval: float, close_timeout: float
+    ):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.close_timeout = close_timeout
+        self.closed = False
+        # the batch the flusher holds, and its write once that has started
+        self.batch: list = []
+        self.flushing: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+
+    def submit(self, review: Review, wait: bool) -> Optional[asyncio.Future]:
+        """Queue a review; with `wait` the returned future resolves on flush."""
+        if self.closed:
+            raise ServiceBusy()
+
+        future = asyncio.get_running_loop().create_future() if wait else None
+
+        try:
+            self.queue.put_nowait((review, future))
+        except asyncio.QueueFull:
+            raise ServiceBusy()
+
+        return future
+
+    async def run(self) -> None:
+        while True:
+            self.batch = [await self.queue.get()]
+            await asyncio.sleep(self.interval)
+
+            while len(self.batch) < self.batch_size and not self.queue.empty():
+                self.batch.append(self.queue.get_nowait())
+
+            # shielded, so cancelling the flusher cannot cut a write off midway
+            # and leave it unknown whether its transaction committed
+            self.flushing = asyncio.ensure_future(self.flush_batch(self.batch))
+            await asyncio.shield(self.flushing)
+            self.batch, self.flushing = [], None
+
+    async def flush_batch(self, batch: list) -> None:
+        try:
+            await self.flush(batch)
+        except Exception as e:
+            # the flusher has to outlive any one batch
+            logging.error(f"review flush failed: {e}")
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    async def write(self, batch: list) -> dict:
+        """Store `batch` in one transaction.
+
+        Returns the new RATING_COLUMNS row of every reviewed book that exists;
+        reviews of other books are not stored.
+        """
+        ratings = defaultdict(list)
+
+        for review, _ in batch:
+            ratings[review.book_uid].append(review.rating)
+
+        async with async_session() as session:
+            existing = await book_service.record_rating_batch(ratings, session)
+            session.add_all(
+                review for review, _ in batch if review.book_uid in existing
+            )
+            await session.commit()
+
+        return existing
+
+    async def flush(self, batch: list) -> None:
+        try:
+            existing = await self.write(batch)
+            written = batch
+        except Exception as e:
+            # one bad row, say a user deleted since, fails the whole batch
+            logging.error(f"review flush of {len(batch)} failed, retrying: {e}")
+            existing = {}
+            written = []
+
+            for review, future in batch:
+                try:
+                    existing.update(await self.write([(review, future)]))
+                    written.append((review, future))
+                except Exception as e:
+                    await self.dead_letter(review, future, e)
+
+        if not written:
+            return
+
+        self.batches += 1
+        reviews = Counter(review.book_uid for review, _ in written)
+
+        for book_uid, book in existing.items():
+            await book_detail_cache.invalidate(book_uid)
+            await leaderboards.record(
+                book_uid,
+                book.language,
+                book.review_count,
+                book.rating_sum,
+                reviews=reviews[book_uid],
+            )
+
+        for review, future in written:
+            found = review.book_uid in existing
+
+            if found:
+                self.flushed += 1
+            else:
+                # nothing checked the book when the review was queued
+                logging.warning(f"dropped review for missing book {review.book_uid}")
+                self.dropped += 1
+
+            if future is not None and not future.done():
+                if found:
+                    future.set_result(review)
+                else:
+                    future.set_exception(BookNotFound())
+
+    async def dead_letter(
+        self, review: Review, future: Optional[asyncio.Future], error
+    ) -> None:
+        """Keep a review that could not be stored, acknowledged or not."""
+        logging.error(f"dead-lettering review {review.uid}: {error}")
+        self.dead_lettered += 1
+
+        try:
+            await get_redis().rpush(
+                DEAD_LETTER_KEY,
+                json.dumps(
+                    {"review": review.model_dump(mode="json"), "error": str(error)}
+                ),
+            )
+        except Exception as e:
+            logging.error(f"review {review.uid} is lost: {e}")
+
+        if future is not None and not future.done():
+            future.set_exception(InternalServerError())
+
+    async def close(self, flusher: asyncio.Task) -> None:
+        """Stop taking reviews and wait for the buffered ones, then stop the flusher.
+
+        The wait ends early if the flusher has died and gives up after
+        `close_timeout`. A batch already being written is still allowed to
+        finish; every other review left is dead-lettered.
+        """
+        self.closed = True
+        joined = asyncio.ensure_future(self.queue.join())
+        await asyncio.wait(
+            {joined, flusher},
+            timeout=self.close_timeout,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        joined.cancel()
+        flusher.cancel()
+        await asyncio.wait({flusher})
+
+        if self.flushing is not None:
+            await self.flushing
+            unflushed = []
+        else:
+            # taken off the queue, but cancelled before the write began
+            unflushed = self.batch
+
+        while not self.queue.empty():
+            unflushed.append(self.queue.get_nowait())
+
+        for review, future in unflushed:
+            await self.dead_letter(review, future, "not flushed before shutdown")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "maxsize": self.queue.maxsize,
+            "batches": self.batches,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "dead_lettered": self.dead_lettered,
+        }
+
+
+review_buffer = ReviewBuffer(
+    maxsize=Config.REVIEW_BUFFER_SIZE,
+    batch_size=Config.REVIEW_FLUSH_BATCH_SIZE,
+    interval=Config.REVIEW_FLUSH_INTERVAL,
+    close_timeout=Config.REVIEW_BUFFER_CLOSE_TIMEOUT,
+)
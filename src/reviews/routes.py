@@ -1,33 +1,96 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.dependencies import AcessTokenBearer
-from src.db.main import get_session
+from src.books.service import BookService
+from src.cache import etag_matches, json_response, not_modified, version_etag
+from src.db.main import get_read_session, get_session
 from src.db.models import Review
-from src.errors import InternalServerError
-from src.reviews.schemas import ReviewCreateModel
+from src.config import Config
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.errors import BooklyException, InternalServerError
+from src.reviews.schemas import ReviewCreateModel, ReviewPage
 from src.reviews.service import ReviewService
 
 reviews_router = APIRouter()
 
 review_service = ReviewService()
+book_service = BookService()
 auth_user = Depends(AcessTokenBearer())
 
 
+@reviews_router.get(
+    "/book/{book_id}", response_model=ReviewPage, dependencies=[auth_user]
+)
+async def get_book_reviews(
+    book_id: str,
+    request: Request,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    rating: Optional[int] = Query(default=None, ge=1, le=5),
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
+    # reviews are only ever added, each in the transaction that bumps the
+    # book's review_count, so the count versions every page of the listing.
+    # It is read before the page, so a racing review can only make the ETag
+    # older than the body, never the other way round
+    version = await book_service.get_book_version(book_id, session)
+    etag = version_etag(
+        "reviews",
+        book_id,
+        limit,
+        cursor,
+        rating,
+        version.review_count if version else None,
+    )
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+
+    reviews, next_cursor = await review_service.get_book_reviews(
+        book_id, session, limit, cursor, rating
+    )
+    payload = (
+        ReviewPage.model_validate(
+            {"reviews": reviews, "next_cursor": next_cursor}, from_attributes=True
+        )
+        .model_dump_json()
+        .encode()
+    )
+    return json_response(payload, etag)
+
+
 @reviews_router.post("/book/{book_id}", response_model=Review)
 async def submit_review(
     book_id: str,
     review_data: ReviewCreateModel,
+    response: Response,
     auth: dict = auth_user,
     session: AsyncSession = Depends(get_session),
 ):
     try:
-        review = await review_service.submit_review(
-            user_uid=auth.get("user")["uid"],
-            book_uid=book_id,
-            review_data=review_data,
-            session=session,
-        )
+        if Config.REVIEW_INGEST_MODE == "buffered":
+            wait_for_flush = Config.REVIEW_INGEST_ACK == "flushed"
+            review = await review_service.enqueue_review(
+                user_uid=auth.get("user")["uid"],
+                book_uid=book_id,
+                review_data=review_data,
+                wait_for_flush=wait_for_flush,
+            )
+
+            if not wait_for_flush:
+                response.status_code = status.HTTP_202_ACCEPTED
+        else:
+            review = await review_service.submit_review(
+                user_uid=auth.get("user")["uid"],
+                book_uid=book_id,
+                review_data=review_data,
+                session=session,
+            )
         return review
+    except BooklyException:
+        raise
     except Exception as e:
         raise InternalServerError()
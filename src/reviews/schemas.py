@@ -1,17 +1,24 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 import uuid
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 
 
 class Review(BaseModel):
     uid: uuid.UUID
     rating: int
-    comment: str
+    comment: str = Field(validation_alias=AliasChoices("comment", "review_text"))
     book_uid: Optional[uuid.UUID]
     user_uid: Optional[uuid.UUID]
     created_at: datetime
-    updated_at: datetime
+    updated_at: datetime = Field(
+        validation_alias=AliasChoices("updated_at", "update_at")
+    )
+
+
+class ReviewPage(BaseModel):
+    reviews: List[Review]
+    next_cursor: Optional[str]
 
 
 class ReviewCreateModel(BaseModel):
@@ -1,8 +1,16 @@
+import uuid
+from datetime import datetime
+
 from src.auth.service import AuthService
 from src.db.models import Review
+from src.db.pagination import DEFAULT_PAGE_SIZE, keyset, paginate
+from src.books.cache import book_detail_cache
+from src.books.leaderboard import leaderboards
 from src.books.service import BookService
 from src.errors import BookNotFound, InternalServerError
+from src.reviews.buffer import review_buffer
 from src.reviews.schemas import ReviewCreateModel
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 import logging
 
@@ -10,8 +18,31 @@ import logging
 book_service = BookService()
 user_service = AuthService()
 
+REVIEW_KEYSET = (Review.created_at, Review.uid)
+REVIEW_CURSOR = (datetime.fromisoformat, uuid.UUID)
+
+
+def review_cursor_key(review: Review):
+    return review.created_at, review.uid
+
 
 class ReviewService:
+    async def get_book_reviews(
+        self,
+        book_uid: str,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        rating: int | None = None,
+    ):
+        statement = select(Review).where(Review.book_uid == book_uid)
+
+        if rating is not None:
+            statement = statement.where(Review.rating == rating)
+
+        statement = keyset(statement, REVIEW_KEYSET, REVIEW_CURSOR, limit, cursor)
+        result = await session.exec(statement)
+        return paginate(result.all(), limit, review_cursor_key)
 
     async def submit_review(
         self,
@@ -23,7 +54,11 @@ class ReviewService:
 
         try:
 
-            book = await book_service.get_book_by_id(book_uid, session)
+            # moves the rating aggregates in this transaction and doubles as
+            # the existence check
+            book = await book_service.record_rating(
+                book_uid, review_data.rating, session
+            )
 
             if not book:
                 raise BookNotFound()
@@ -31,7 +66,8 @@ class ReviewService:
             # user = await user_service.get_user_by_id(user_uid, session)
 
             new_review = Review(
-                **review_data.model_dump(),
+                rating=review_data.rating,
+                review_text=review_data.comment,
                 book_uid=book_uid,
                 user_uid=user_uid,
                 # user=user,
@@ -40,9 +76,47 @@ class ReviewService:
 
             session.add(new_review)
             await session.commit()
+            await book_detail_cache.invalidate(book_uid)
+            await leaderboards.record(
+                book.uid, book.language, book.review_count, book.rating_sum
+            )
 
             return new_review
         except Exception as e:
             logging.error(e)
             await session.rollback()
             raise InternalServerError()
+
+    async def enqueue_review(
+        self,
+        user_uid: str,
+        book_uid: str,
+        review_data: ReviewCreateModel,
+        wait_for_flush: bool,
+    ) -> Review:
+        """Hand a review to the write-behind buffer instead of inserting it.
+
+        The uid and timestamps are assigned here so the response is final
+        whether or not it waits for the flush.
+        """
+        try:
+            book_uid = uuid.UUID(book_uid)
+        except ValueError:
+            raise BookNotFound()
+
+        now = datetime.now()
+        new_review = Review(
+            uid=uuid.uuid4(),
+            rating=review_data.rating,
+            review_text=review_data.comment,
+            book_uid=book_uid,
+            user_uid=uuid.UUID(str(user_uid)),
+            created_at=now,
+            update_at=now,
+        )
+        flushed = review_buffer.submit(new_review, wait=wait_for_flush)
+
+        if flushed is not None:
+            return await flushed
+
+        return new_review
@@ -0,0 +1,115 @@
+import asyncio
+import uuid
+
+from src.books.bulk import ROW_TOO_LONG, iter_csv_rows, iter_lines, iter_ndjson_rows
+from src.books.service import BookService
+from src.db.models import Book
+
+
+async def stream(data: bytes, chunk_size: int = 7):
+    for start in range(0, len(data), chunk_size):
+        yield data[start : start + chunk_size]
+
+
+def parse(parser, data: bytes) -> list:
+    async def collect():
+        return [row async for row in parser(iter_lines(stream(data)))]
+
+    return asyncio.run(collect())
+
+
+def test_csv_rows_handle_quoted_newlines_and_bad_rows():
+    data = (
+        "title,author,published_date,page_count,language\r\n"
+        '"Arrow, of God","Chinua\nAchebe",1964-01-01,287,en\n'
+        "short,row\n"
+    ).encode()
+
+    assert parse(iter_csv_rows, data) == [
+        (
+            1,
+            {
+                "title": "Arrow, of God",
+                "author": "Chinua\nAchebe",
+                "published_date": "1964-01-01",
+                "page_count": "287",
+                "language": "en",
+            },
+            None,
+        ),
+        (2, None, "expected 5 fields, got 2"),
+    ]
+
+
+def test_ndjson_rows_report_malformed_lines():
+    data = '{"title": "Arrow of God"}\n\nnot json\n[1]'.encode()
+
+    rows = parse(iter_ndjson_rows, data)
+
+    assert rows[0] == (1, {"title": "Arrow of God"}, None)
+    assert rows[1][0] == 2 and rows[1][2].startswith("invalid JSON")
+    assert rows[2] == (3, None, "expected a JSON object")
+
+
+def test_overlong_lines_and_records_cost_one_row():
+    async def collect(parser, data: bytes):
+        lines = iter_lines(stream(data), max_length=40)
+        return [row async for row in parser(lines)]
+
+    ndjson = ('{"title": "' + "x" * 100 + '"}\n{"title": "Arrow of God"}').encode()
+
+    assert asyncio.run(collect(iter_ndjson_rows, ndjson)) == [
+        (1, None, ROW_TOO_LONG),
+        (2, {"title": "Arrow of God"}, None),
+    ]
+
+    # the unmatched quote holds the record open only until it outgrows the
+    # cap; parsing then carries on from the next line
+    csv_data = ('title,author\n"Arrow,Chinua\n' + "more,text\n" * 10).encode()
+    rows = asyncio.run(
+        collect(lambda lines: iter_csv_rows(lines, max_length=40), csv_data)
+    )
+
+    assert rows[0] == (1, None, ROW_TOO_LONG)
+    assert rows[-1] == (len(rows), {"title": "more", "author": "text"}, None)
+
+
+class RecordingSession:
+    def __init__(self):
+        self.rows = []
+
+    async def exec(self, statement, params=None):
+        self.rows.extend(params)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+def test_imported_rows_fill_every_required_column():
+    data = (
+        "title,author,publisher,published_date,page_count,language\n"
+        "Arrow of God,Chinua Achebe,Heinemann,1964-01-01,287,en\n"
+        "No Publisher,Someone,,1964-01-01,1,en\n"
+    ).encode()
+    session = RecordingSession()
+
+    async def run():
+        rows = iter_csv_rows(iter_lines(stream(data)))
+        return await BookService().import_books(rows, uuid.uuid4(), session)
+
+    report = asyncio.run(run())
+
+    required = {
+        column.name
+        for column in Book.__table__.columns
+        if not column.nullable
+        and column.default is None
+        and column.server_default is None
+        and column.computed is None
+    }
+    assert report["inserted"] == 2
+    assert [row["publisher"] for row in session.rows] == ["Heinemann", ""]
+    assert all(required <= row.keys() for row in session.rows)
@@ -0,0 +1,133 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from src.books import cache as book_cache
+from src.books.cache import BookDetailCache
+from src.auth.utils import create_access_token, decode_access_token_cached, token_cache
+from src.cache import LRUCache, SingleFlight, etag_matches, version_etag
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_cache_drops_expired_entries():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1, expires_at=time.time() - 1)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_token_is_decoded_once():
+    token_cache.clear()
+    token = create_access_token(data={"email": "johndoe@mail.com"})
+    misses = token_cache.misses
+
+    first = decode_access_token_cached(token)
+    second = decode_access_token_cached(token)
+
+    assert first == second
+    assert first["user"]["email"] == "johndoe@mail.com"
+    assert token_cache.misses == misses + 1
+
+
+def test_etag_changes_with_version_and_matches_if_none_match():
+    etag = version_etag("book", "uid", "2024-01-01T00:00:00", 3)
+
+    assert etag == version_etag("book", "uid", "2024-01-01T00:00:00", 3)
+    assert etag != version_etag("book", "uid", "2024-01-01T00:00:00", 4)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    flights = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "book"
+
+    async def run():
+        first = asyncio.ensure_future(flights.do("key", load))
+        results = await asyncio.gather(*(flights.do("key", load) for _ in range(9)))
+
+        return await first, results
+
+    first, results = asyncio.run(run())
+
+    assert first == "book" and results == ["book"] * 9
+    assert len(calls) == 1
+    assert flights.stats() == {"in_flight": 0, "started": 1, "shared": 9}
+
+
+def test_single_flight_survives_a_cancelled_caller():
+    flights = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        leader = asyncio.ensure_future(flights.do("key", load))
+        follower = asyncio.ensure_future(flights.do("key", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        return await asyncio.gather(follower, return_exceptions=True)
+
+    [error] = asyncio.run(run())
+
+    assert isinstance(error, ValueError)
+    assert flights.calls == {}
+
+
+def test_detail_cache_fill_does_not_undo_a_concurrent_invalidate(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = BookDetailCache(
+        ttl=300, jitter=0, missing_ttl=5, lock_timeout=5, lock_wait=0.1
+    )
+    book_uid = str(uuid.uuid4())
+
+    async def run():
+        redis = fakeredis.FakeAsyncRedis()
+        monkeypatch.setattr(book_cache, "get_redis", lambda: redis)
+
+        async def load_then_race_a_write():
+            # a writer commits v2 and invalidates while v1 is being rendered
+            await cache.invalidate(book_uid)
+            return '"v1"', b"{}"
+
+        async def load_fresh():
+            return '"v2"', b"{}"
+
+        stale = await cache.get_or_load(book_uid, load_then_race_a_write)
+        cached = await cache.peek(book_uid)
+        fresh = await cache.get_or_load(book_uid, load_fresh)
+        return stale, cached, fresh, await cache.peek(book_uid)
+
+    stale, cached, fresh, cached_after = asyncio.run(run())
+
+    assert stale == ('"v1"', b"{}")
+    assert cached is None
+    assert fresh == cached_after == ('"v2"', b"{}")
+    assert cache.stats()["stale_fills"] == 1
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.auth.utils import PasswordHasher
+from src.errors import ServiceBusy
+
+
+def test_password_hasher_runs_off_the_event_loop():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+
+    async def main():
+        return await hasher.run(threading.current_thread)
+
+    try:
+        assert asyncio.run(main()) is not threading.current_thread()
+    finally:
+        hasher.shutdown()
+
+
+def test_password_hasher_rejects_work_beyond_max_pending():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    release = threading.Event()
+
+    async def main():
+        first = asyncio.ensure_future(hasher.run(release.wait))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ServiceBusy):
+            await hasher.run(release.wait)
+
+        release.set()
+        assert await first is True
+        assert hasher.pending == 0
+
+    try:
+        asyncio.run(main())
+    finally:
+        hasher.shutdown()
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_hash_finishes():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    started, release = threading.Event(), threading.Event()
+
+    def hash_slowly():
+        started.set()
+        release.wait()
+
+    async def main():
+        first = asyncio.ensure_future(hasher.run(hash_slowly))
+        await asyncio.to_thread(started.wait)
+        first.cancel()
+        await asyncio.sleep(0)
+
+        # the thread is still hashing, so the slot is still taken
+        with pytest.raises(ServiceBusy):
+            await hasher.run(release.wait)
+
+        release.set()
+        await asyncio.to_thread(hasher.executor.submit(lambda: None).result)
+        assert hasher.pending == 0
+
+    try:
+        asyncio.run(main())
+    finally:
+        hasher.shutdown()
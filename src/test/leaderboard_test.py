@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from src.books.leaderboard import Leaderboards
+
+EPOCH = datetime(2026, 1, 1)
+
+
+def make_leaderboards() -> Leaderboards:
+    return Leaderboards(
+        size=10,
+        prior_mean=3.0,
+        prior_weight=10,
+        half_life=timedelta(hours=72),
+        epoch=EPOCH,
+    )
+
+
+def test_rating_score_pulls_sparse_books_toward_the_prior():
+    boards = make_leaderboards()
+
+    one_perfect_review = boards.rating_score(review_count=1, rating_sum=5)
+    many_good_reviews = boards.rating_score(review_count=200, rating_sum=900)
+
+    assert 3.0 < one_perfect_review < many_good_reviews < 4.5
+
+
+def test_trending_weight_doubles_every_half_life():
+    boards = make_leaderboards()
+
+    assert boards.trending_weight(EPOCH) == 1
+    assert boards.trending_weight(EPOCH + timedelta(hours=72)) == 2
+    assert boards.trending_weight(EPOCH + timedelta(hours=216)) == 8
@@ -0,0 +1,39 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from src.db.pagination import decode_cursor, encode_cursor, paginate
+from src.errors import InvalidCursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 1, 25, 15, 19, 50, 590006)
+    uid = uuid.uuid4()
+
+    cursor = encode_cursor(created_at, uid)
+
+    assert decode_cursor(cursor, datetime.fromisoformat, uuid.UUID) == (
+        created_at,
+        uid,
+    )
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor", datetime.fromisoformat, uuid.UUID)
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor("2025-01-25"), datetime.fromisoformat, uuid.UUID)
+
+
+def test_paginate_sets_next_cursor_only_when_more_rows_exist():
+    rows = [(datetime(2025, 1, day), uuid.uuid4()) for day in (3, 2, 1)]
+
+    items, next_cursor = paginate(rows, 2, lambda row: row)
+    assert items == rows[:2]
+    assert decode_cursor(next_cursor, datetime.fromisoformat, uuid.UUID) == rows[1]
+
+    items, next_cursor = paginate(rows, 3, lambda row: row)
+    assert items == rows
+    assert next_cursor is None
@@ -0,0 +1,128 @@
+import asyncio
+import uuid
+
+import pytest
+
+from src.db.models import Review
+from src.errors import BookNotFound, InternalServerError, ServiceBusy
+from src.reviews.buffer import ReviewBuffer
+
+
+def make_review() -> Review:
+    return Review(uid=uuid.uuid4(), rating=4, review_text="A good read")
+
+
+def test_full_buffer_rejects_reviews():
+    async def run():
+        buffer = ReviewBuffer(maxsize=2, batch_size=10, interval=0.01, close_timeout=1)
+        buffer.submit(make_review(), wait=False)
+        flushed = buffer.submit(make_review(), wait=True)
+
+        with pytest.raises(ServiceBusy):
+            buffer.submit(make_review(), wait=False)
+
+        return buffer, flushed
+
+    buffer, flushed = asyncio.run(run())
+
+    assert buffer.stats()["queued"] == 2
+    assert not flushed.done()
+
+
+def test_closed_buffer_rejects_reviews():
+    async def run():
+        buffer = ReviewBuffer(maxsize=2, batch_size=10, interval=0.01, close_timeout=1)
+        flusher = asyncio.ensure_future(buffer.run())
+        await buffer.close(flusher)
+
+        with pytest.raises(ServiceBusy):
+            buffer.submit(make_review(), wait=False)
+
+    asyncio.run(run())
+
+
+class FailingBuffer(ReviewBuffer):
+    """Fails every multi-row batch, and every write of the `bad` review."""
+
+    def __init__(self, bad: Review):
+        super().__init__(maxsize=10, batch_size=10, interval=0.01, close_timeout=1)
+        self.bad = bad
+
+    async def write(self, batch: list) -> dict:
+        if len(batch) > 1 or batch[0][0] is self.bad:
+            raise ValueError("violates foreign key constraint")
+
+        # no book exists, so the stored review counts as dropped
+        return {}
+
+
+def test_failed_batch_is_retried_row_by_row():
+    bad, good = make_review(), make_review()
+
+    async def run():
+        buffer = FailingBuffer(bad)
+        loop = asyncio.get_running_loop()
+        bad_future, good_future = loop.create_future(), loop.create_future()
+        await buffer.flush([(bad, bad_future), (good, good_future)])
+        return buffer, bad_future, good_future
+
+    buffer, bad_future, good_future = asyncio.run(run())
+
+    assert isinstance(bad_future.exception(), InternalServerError)
+    assert isinstance(good_future.exception(), BookNotFound)
+    assert buffer.stats()["dead_lettered"] == 1
+    assert buffer.stats()["dropped"] == 1
+
+
+def test_close_does_not_wait_on_a_dead_flusher():
+    async def run():
+        buffer = ReviewBuffer(maxsize=2, batch_size=10, interval=0.01, close_timeout=60)
+        flusher = asyncio.ensure_future(asyncio.sleep(0))
+        await flusher
+        flushed = buffer.submit(make_review(), wait=True)
+        await asyncio.wait_for(buffer.close(flusher), timeout=5)
+        return buffer, flushed
+
+    buffer, flushed = asyncio.run(run())
+
+    assert isinstance(flushed.exception(), InternalServerError)
+    assert buffer.stats()["queued"] == 0
+    assert buffer.stats()["dead_lettered"] == 1
+
+
+class SlowBuffer(ReviewBuffer):
+    """Writes take until `release` is set."""
+
+    def __init__(self):
+        super().__init__(maxsize=10, batch_size=10, interval=0, close_timeout=0.01)
+        self.writing = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def write(self, batch: list) -> dict:
+        self.writing.set()
+        await self.release.wait()
+        return {}
+
+
+def test_close_lets_a_running_flush_finish_after_the_timeout():
+    async def run():
+        buffer = SlowBuffer()
+        flusher = asyncio.ensure_future(buffer.run())
+        in_flight = buffer.submit(make_review(), wait=True)
+        await buffer.writing.wait()
+        queued = buffer.submit(make_review(), wait=True)
+
+        closing = asyncio.ensure_future(buffer.close(flusher))
+        await asyncio.sleep(0.05)
+        assert not closing.done()
+
+        buffer.release.set()
+        await asyncio.wait_for(closing, timeout=5)
+        return buffer, in_flight, queued
+
+    buffer, in_flight, queued = asyncio.run(run())
+
+    # the write finished, so its outcome is known rather than dead-lettered
+    assert isinstance(in_flight.exception(), BookNotFound)
+    assert isinstance(queued.exception(), InternalServerError)
+    assert buffer.stats()["dead_lettered"] == 1
@@ -0,0 +1,42 @@
+import uuid
+
+from src.books.suggest import PrefixIndex
+
+
+def test_suggestions_match_title_and_author_prefixes():
+    index = PrefixIndex(max_entries=100, max_length=100)
+    index.add(uuid.uuid4(), "Things Fall Apart", "Chinua Achebe")
+    index.add(uuid.uuid4(), "Arrow of God", "Chinua Achebe")
+    index.add(uuid.uuid4(), "The Thing Around Your Neck", "Chimamanda Adichie")
+
+    assert index.suggest("chi", 10) == ["Chimamanda Adichie", "Chinua Achebe"]
+    assert index.suggest("THING", 10) == ["Things Fall Apart"]
+    assert index.suggest("chi", 1) == ["Chimamanda Adichie"]
+    assert index.suggest("zz", 10) == []
+
+
+def test_shared_terms_survive_until_the_last_book_is_removed():
+    index = PrefixIndex(max_entries=100, max_length=100)
+    first, second = uuid.uuid4(), uuid.uuid4()
+    index.add(first, "Things Fall Apart", "Chinua Achebe")
+    index.add(second, "Arrow of God", "Chinua Achebe")
+
+    index.remove(first)
+    assert index.suggest("chinua", 10) == ["Chinua Achebe"]
+    assert index.suggest("things", 10) == []
+
+    index.add(second, "No Longer at Ease", "Chinua Achebe")
+    assert index.suggest("arrow", 10) == []
+    assert index.suggest("no longer", 10) == ["No Longer at Ease"]
+
+    index.remove(second)
+    assert len(index) == 0
+
+
+def test_index_stops_growing_at_max_entries():
+    index = PrefixIndex(max_entries=2, max_length=100)
+    index.add(uuid.uuid4(), "Arrow of God", "Chinua Achebe")
+    index.add(uuid.uuid4(), "Half of a Yellow Sun", "Chimamanda Adichie")
+
+    assert len(index) == 2
+    assert index.suggest("half", 10) == []
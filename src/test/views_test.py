@@ -0,0 +1,47 @@
+import asyncio
+import json
+import uuid
+
+from src.books.views import ViewCounter, merge_field
+
+
+def test_views_aggregate_in_memory_until_flushed():
+    counter = ViewCounter(shards=4, interval=60)
+    book_uid = uuid.uuid4()
+
+    for _ in range(3):
+        counter.record(book_uid)
+
+    assert counter.pending == {str(book_uid): 3}
+    assert counter.stats()["pending_views"] == 3
+
+
+def test_shards_are_stable_and_bounded():
+    counter = ViewCounter(shards=4, interval=60)
+    book_uid = str(uuid.uuid4())
+
+    assert counter.shard_key(book_uid) == counter.shard_key(book_uid.upper())
+    assert {counter.shard_key(str(uuid.uuid4())) for _ in range(100)} <= {
+        f"book_views:{shard}" for shard in range(4)
+    }
+
+
+def test_close_stops_the_flusher():
+    async def run():
+        counter = ViewCounter(shards=4, interval=60)
+        flusher = asyncio.ensure_future(counter.run())
+        await asyncio.sleep(0)
+        await asyncio.wait_for(counter.close(flusher), timeout=1)
+
+        return flusher
+
+    assert asyncio.run(run()).done()
+
+
+def test_merge_field_appends_to_encoded_object():
+    payload = json.dumps({"title": "Arrow of God"}).encode()
+
+    assert json.loads(merge_field(payload, "view_count", 3)) == {
+        "title": "Arrow of God",
+        "view_count": 3,
+    }